@@ -0,0 +1,150 @@
+"""Recall@k and query latency of the ANN backends against exact search.
+
+By default this runs on the real index (built first if needed) with held-out
+queries: the questions in rag_questions.json, embedded with the index's model,
+plus ``--holdout`` chunk vectors that are taken out of the corpus and used as
+queries. ``--vectors`` caps the corpus size. ``--synthetic`` uses clustered
+random unit vectors instead, to try sizes the bundled manuals cannot reach;
+tight clusters make IVF look better than it does on real embeddings, so do not
+tune defaults on those numbers alone:
+
+    python benchmarks/ann_benchmark.py --k 10
+    python benchmarks/ann_benchmark.py --backend hashing --index-dir /tmp/ann-index
+    python benchmarks/ann_benchmark.py --synthetic --vectors 200000 --queries 200
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+QUESTIONS_FILE = os.path.join(BENCH_DIR, "rag_questions.json")
+
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src", "poultry_rag"))
+
+from ann_index import HNSWIndex, IVFIndex, exact_search  # noqa: E402
+from vector_math import normalize  # noqa: E402
+
+
+def synthetic_vectors(count, dim, clusters, spread=1.0, seed=0):
+    """Unit vectors drawn around random topic centres, roughly like sentence embeddings."""
+    rng = np.random.default_rng(seed)
+    centres = normalize(rng.normal(size=(clusters, dim)))
+    labels = rng.integers(0, clusters, size=count)
+    noise = rng.normal(size=(count, dim)).astype(np.float32) * (spread / np.sqrt(dim))
+    return normalize(centres[labels] + noise)
+
+
+def index_vectors(args):
+    """Corpus and held-out queries from the real index, in the same embedding space."""
+    # index_store reads these when first imported
+    if args.index_dir:
+        os.environ["POULTRY_RAG_INDEX_DIR"] = os.path.abspath(args.index_dir)
+    if args.backend:
+        os.environ["EMBED_BACKEND"] = args.backend
+    import index_store
+
+    embeddings = index_store.get_embeddings()
+    vectors = np.asarray(index_store.load_index(index_store.scan_documents(), embeddings).vectors, dtype=np.float32)
+    if args.vectors:
+        vectors = vectors[:args.vectors]
+
+    with open(args.questions, "r", encoding="utf-8") as file:
+        questions = [question["question"] for question in json.load(file)]
+    question_vectors = np.asarray([embeddings.embed_query(question) for question in questions], dtype=np.float32)
+
+    # Held-out chunks leave the corpus, so no query is its own nearest neighbour
+    holdout = min(args.holdout, len(vectors) // 10)
+    rng = np.random.default_rng(1)
+    held = np.zeros(len(vectors), dtype=bool)
+    held[rng.choice(len(vectors), holdout, replace=False)] = True
+    queries = np.vstack([question_vectors, vectors[held]])
+    return vectors[~held], queries, {"questions": len(questions), "holdout": holdout}
+
+
+def synthetic_queries(vectors, count):
+    # Perturbed corpus vectors, so each query has real near neighbours
+    rng = np.random.default_rng(1)
+    picks = rng.choice(len(vectors), count, replace=False)
+    return normalize(vectors[picks] + 0.05 * rng.normal(size=(count, vectors.shape[1])))
+
+
+def measure(search, queries, truth, k):
+    latencies, recalls = [], []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        found, _ = search(query, k)
+        latencies.append(time.perf_counter() - start)
+        recalls.append(len(set(found.tolist()) & expected) / len(expected))
+    latencies = np.array(latencies) * 1000
+    return {
+        "recall": round(float(np.mean(recalls)), 4),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, help="Cap the corpus at this many vectors (synthetic default: 100000)")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--index-dir", help="Index to read (and build if missing); defaults to the app's index")
+    parser.add_argument("--backend", help="Embedding backend (EMBED_BACKEND) the index was built with")
+    parser.add_argument("--questions", default=QUESTIONS_FILE, help="Held-out questions to embed as queries")
+    parser.add_argument("--holdout", type=int, default=200, help="Chunk vectors held out of the corpus as queries")
+    parser.add_argument("--synthetic", action="store_true", help="Use synthetic clustered vectors instead")
+    parser.add_argument("--queries", type=int, default=200, help="Synthetic queries")
+    parser.add_argument("--dim", type=int, default=384, help="Synthetic dimension")
+    parser.add_argument("--clusters", type=int, default=500, help="Synthetic topic clusters")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON lines")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        vectors = synthetic_vectors(args.vectors or 100000, args.dim, args.clusters)
+        queries = synthetic_queries(vectors, args.queries)
+        source = {"source": "synthetic", "clusters": args.clusters}
+    else:
+        vectors, queries, held_out = index_vectors(args)
+        source = {"source": "index", **held_out}
+    truth = [set(exact_search(vectors, query, args.k)[0].tolist()) for query in queries]
+
+    results = [{"backend": "exact", "param": None, **measure(lambda q, k: exact_search(vectors, q, k), queries, truth, args.k)}]
+
+    start = time.perf_counter()
+    ivf = IVFIndex.build(vectors)
+    build_seconds = round(time.perf_counter() - start, 2)
+    # The sweep plus the default (IVF_NPROBE, or an eighth of the lists)
+    for nprobe in sorted({1, 2, 4, 8, 16, 32, 64, ivf.nprobe}):
+        ivf.nprobe = nprobe
+        results.append({"backend": "ivf", "param": f"nprobe={nprobe}", "build_s": build_seconds,
+                        **measure(ivf.search, queries, truth, args.k)})
+
+    try:
+        start = time.perf_counter()
+        hnsw = HNSWIndex.build(vectors)
+        build_seconds = round(time.perf_counter() - start, 2)
+        for ef in (16, 32, 64, 128, 256):
+            hnsw.ef_search = ef
+            results.append({"backend": "hnsw", "param": f"ef={ef}", "build_s": build_seconds,
+                            **measure(hnsw.search, queries, truth, args.k)})
+    except ImportError:
+        print("ℹ️ hnswlib not installed, skipping HNSW (pip install poultry-rag[ann])", file=sys.stderr)
+
+    header = {**source, "vectors": len(vectors), "queries": len(queries), "dim": int(vectors.shape[1]), "k": args.k}
+    if args.json:
+        for row in results:
+            print(json.dumps({**header, **row}))
+        return
+
+    print(f"{header['source']} vectors: {len(vectors)} x {vectors.shape[1]}, {len(queries)} queries, "
+          f"recall@{args.k} vs exact search")
+    print(f"{'backend':<8} {'param':<12} {'recall':>8} {'p50 ms':>9} {'p95 ms':>9}")
+    for row in results:
+        print(f"{row['backend']:<8} {row['param'] or '-':<12} {row['recall']:>8.4f} {row['p50_ms']:>9.3f} {row['p95_ms']:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Cold-start import time and resident memory of each Streamlit page.
+
+Every page's top-level imports run in a fresh interpreter, the way a new
+Streamlit server process would load them. Streamlit itself is imported first
+and reported separately, since every page pays for it:
+
+    python benchmarks/import_time.py --repeat 5
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "poultry_rag")
+
+# Runs inside the child interpreter: time the imports, then report RSS from /proc (or ru_maxrss)
+PROBE = """
+import json, os, sys, time
+sys.path.insert(0, {app_dir!r})
+os.chdir({app_dir!r})
+
+def rss_mb():
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+base_rss, base_modules = rss_mb(), len(sys.modules)
+start = time.perf_counter()
+import streamlit
+streamlit_s = time.perf_counter() - start
+streamlit_rss, streamlit_modules = rss_mb(), len(sys.modules)
+
+error = None
+start = time.perf_counter()
+try:
+    exec(compile({imports!r}, {page!r}, "exec"), {{}})
+except Exception as e:
+    error = f"{{type(e).__name__}}: {{e}}"
+page_s = time.perf_counter() - start
+
+print(json.dumps({{
+    "streamlit_ms": streamlit_s * 1000,
+    "page_ms": page_s * 1000,
+    "page_rss_mb": rss_mb() - streamlit_rss,
+    "total_rss_mb": rss_mb(),
+    "page_modules": len(sys.modules) - streamlit_modules,
+    "error": error,
+}}))
+"""
+
+
+def page_imports(path):
+    """Source of the page's module-level import statements."""
+    with open(path, "r", encoding="utf-8") as file:
+        tree = ast.parse(file.read(), path)
+    imports = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return "\n".join(ast.unparse(node) for node in imports)
+
+
+def measure(page, repeat):
+    path = os.path.join(APP_DIR, page)
+    code = PROBE.format(app_dir=os.path.abspath(APP_DIR), imports=page_imports(path), page=path)
+    runs = []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    # Median run by page import time; the first run also pays for cold .pyc compilation
+    runs.sort(key=lambda run: run["page_ms"])
+    best = runs[len(runs) // 2]
+    return {"page": page, **{key: round(value, 1) if isinstance(value, float) else value for key, value in best.items()}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per page (median is reported)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON lines")
+    args = parser.parse_args()
+
+    pages = ["main.py"] + sorted(
+        os.path.join("pages", name) for name in os.listdir(os.path.join(APP_DIR, "pages")) if name.endswith(".py")
+    )
+    results = [measure(page, args.repeat) for page in pages]
+
+    if args.json:
+        for row in results:
+            print(json.dumps(row))
+        return
+
+    print(f"{'page':<28} {'streamlit ms':>12} {'page ms':>9} {'page MB':>8} {'total MB':>9} {'modules':>8}")
+    for row in results:
+        print(f"{row['page']:<28} {row['streamlit_ms']:>12.0f} {row['page_ms']:>9.0f} "
+              f"{row['page_rss_mb']:>8.1f} {row['total_rss_mb']:>9.1f} {row['page_modules']:>8}"
+              + (f"  ⚠️ {row['error']}" if row["error"] else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""Offline retrieval and answer benchmark over the bundled poultry manuals.
+
+Builds a fresh index of src/poultry_rag/docs/*.pdf in a temporary folder, then
+asks every question in rag_questions.json and checks whether a chunk from one of
+its expected pages (0-based, like the chunk metadata) is retrieved. The
+"context" mode is what main.py actually puts into the prompt: at most 3 parent
+sections within CONTEXT_CHAR_BUDGET, so only recall@1..3 applies to it:
+
+    python benchmarks/rag_benchmark.py --json > results.jsonl
+    python benchmarks/rag_benchmark.py --backend hashing --answers 10
+
+Groq, Gemini, Google CSE, YouTube and OpenWeather are replaced by the stand-ins
+in offline.py, so no network or API key is needed. With --answers N the first N
+questions also go through main.py itself (via Streamlit's AppTest) to time the
+full chat turn. Every JSON line carries the commit and index settings, so runs
+from different commits can be compared directly.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.abspath(os.path.join(BENCH_DIR, "..", "src", "poultry_rag"))
+QUESTIONS_FILE = os.path.join(BENCH_DIR, "rag_questions.json")
+MODES = ("hybrid", "dense", "sparse", "context")
+APP_CONTEXT_K = 3  # chunks main.py puts into the prompt
+
+sys.path.insert(0, APP_DIR)
+
+
+def load_questions(path):
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def folder_mb(path):
+    total = sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+    return round(total / 1024 / 1024, 2)
+
+
+def is_expected(doc, expected):
+    pages = expected.get(os.path.basename(doc.metadata.get("source", "")), ())
+    # Parent sections may span pages
+    return any(page in pages for page in doc.metadata.get("pages", [doc.metadata.get("page")]))
+
+
+def first_hit(docs, expected):
+    """1-based rank of the first chunk from an expected page, or None."""
+    return next((rank for rank, doc in enumerate(docs, start=1) if is_expected(doc, expected)), None)
+
+
+def search(store, mode, query, query_vector, k):
+    from hybrid_search import hybrid_search
+    from rag_chain import retrieve
+
+    if mode == "context":
+        return retrieve(store, query, query_vector, k=APP_CONTEXT_K)
+    if mode == "hybrid":
+        return hybrid_search(store, query, query_vector, k=k)
+    if mode == "dense":
+        indices, _ = store.search_indices(query_vector, k)
+    else:
+        indices, _ = store.bm25.search(query, k)
+    return [store.document(int(i)) for i in indices]
+
+
+def latency(values_ms):
+    return {
+        "p50_ms": round(float(np.percentile(values_ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(values_ms, 95)), 3),
+    }
+
+
+def build(pdf_files):
+    import index_store
+
+    embeddings = index_store.get_embeddings()
+    start = time.perf_counter()
+    index_store.build_index(pdf_files, embeddings)
+    build_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    store = index_store.load_index(pdf_files, embeddings)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    row = {
+        "kind": "build",
+        "documents": len(pdf_files),
+        "chunks": len(store.texts),
+        "mean_chunk_chars": round(float(np.mean([len(text) for text in store.texts])), 1),
+        "build_s": round(build_s, 2),
+        "embed_s": round(embeddings.stats["seconds"], 2),
+        "chunks_per_sec": embeddings.stats["chunks_per_sec"],
+        "load_ms": round(load_ms, 1),
+        "index_mb": folder_mb(index_store.INDEX_DIR),
+    }
+    return store, row
+
+
+def evaluate(store, questions, ks):
+    """Query-embedding latency, then recall@k, MRR, latency and context size per retrieval mode."""
+    max_k = max(max(ks), APP_CONTEXT_K)
+    embed_ms, vectors = [], []
+    for question in questions:
+        start = time.perf_counter()
+        vectors.append(store.embeddings.embed_query(question["question"]))
+        embed_ms.append((time.perf_counter() - start) * 1000)
+    rows = [{"kind": "embed_query", "queries": len(questions), **latency(embed_ms)}]
+    details = []
+
+    for mode in MODES:
+        if mode != "dense" and store.bm25 is None:
+            continue
+        ranks, search_ms, context_chars = [], [], []
+        for question, vector in zip(questions, vectors):
+            start = time.perf_counter()
+            docs = search(store, mode, question["question"], vector, max_k)
+            search_ms.append((time.perf_counter() - start) * 1000)
+            rank = first_hit(docs, question["expected"])
+            ranks.append(rank)
+            context_chars.append(sum(len(doc.page_content) for doc in docs[:APP_CONTEXT_K]))
+            details.append({"kind": "question", "mode": mode, "id": question["id"], "rank": rank,
+                            "pages": [[os.path.basename(doc.metadata.get("source", "")), doc.metadata.get("page")]
+                                      for doc in docs[:max(ks)]]})
+
+        rows.append({
+            "kind": "retrieval",
+            "mode": mode,
+            "questions": len(questions),
+            **{f"recall@{k}": round(sum(r is not None and r <= k for r in ranks) / len(ranks), 4) for k in ks},
+            f"mrr@{max(ks)}": round(float(np.mean([1 / r if r and r <= max(ks) else 0.0 for r in ranks])), 4),
+            **latency(search_ms),
+            f"context_chars@{APP_CONTEXT_K}": round(float(np.mean(context_chars)), 1),
+        })
+    return rows, details
+
+
+def answer_path(questions, timeout):
+    """Ask each question through main.py and summarise the traced chat turns."""
+    from streamlit.testing.v1 import AppTest
+
+    import tracing
+
+    app = AppTest.from_file(os.path.join(APP_DIR, "main.py"), default_timeout=timeout)
+    app.run()
+    turns, outcomes, errors = [], {}, 0
+    for question in questions:
+        start = time.perf_counter()
+        app.chat_input[0].set_value(question["question"]).run()
+        wall_ms = (time.perf_counter() - start) * 1000
+
+        spans = tracing.recorder.last_trace("chat.turn")
+        turn = spans[0] if spans else {"attrs": {}, "status": "error"}
+        generate = next((span for span in spans if span["name"] == "llm.generate"), {"attrs": {}})
+        failed = turn["status"] == "error" or len(app.exception) > 0 or len(app.error) > 0
+        errors += failed
+        outcome = "error" if failed else turn["attrs"].get("outcome", "unknown")
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+        turns.append({
+            "wall_ms": wall_ms,
+            "ttft_ms": turn["attrs"].get("ttft_ms"),
+            "prompt_tokens": generate["attrs"].get("prompt_tokens"),
+            "output_tokens": generate["attrs"].get("output_tokens"),
+        })
+
+    def mean(key):
+        values = [turn[key] for turn in turns if turn[key] is not None]
+        return round(float(np.mean(values)), 1) if values else None
+
+    ttfts = [turn["ttft_ms"] for turn in turns if turn["ttft_ms"] is not None]
+    stages = tracing.recorder.summary()
+    return {
+        "kind": "answers",
+        "questions": len(questions),
+        "errors": errors,
+        "outcomes": outcomes,
+        **{f"turn_{key}": value for key, value in latency([turn["wall_ms"] for turn in turns]).items()},
+        "ttft_p50_ms": round(float(np.percentile(ttfts, 50)), 1) if ttfts else None,
+        "mean_prompt_tokens": mean("prompt_tokens"),
+        "mean_output_tokens": mean("output_tokens"),
+        "stages_p50_ms": {name: row["p50_ms"] for name, row in stages.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", default=QUESTIONS_FILE, help="JSON list of questions with expected pages")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5, 10], help="Cut-offs for recall@k")
+    parser.add_argument("--backend", help="Embedding backend (EMBED_BACKEND), e.g. torch, onnx-int8 or hashing")
+    parser.add_argument("--index-dir", help="Build into (and reuse shards from) this folder instead of a temp one")
+    parser.add_argument("--answers", type=int, default=0, metavar="N",
+                        help="Also run the first N questions through main.py with the offline stand-ins")
+    parser.add_argument("--timeout", type=float, default=300, help="Seconds allowed per main.py run")
+    parser.add_argument("--details", action="store_true", help="Also emit the retrieved pages per question")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON lines")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="poultry-rag-bench-") as scratch:
+        # The app modules read these when first imported, so set them before any import
+        os.environ["POULTRY_RAG_OFFLINE"] = "1"
+        os.environ["POULTRY_RAG_INDEX_DIR"] = os.path.abspath(args.index_dir or os.path.join(scratch, "index"))
+        os.environ["POULTRY_RAG_CACHE_DIR"] = os.path.join(scratch, "cache")
+        if args.backend:
+            os.environ["EMBED_BACKEND"] = args.backend
+
+        import index_store
+        from embedding_engine import DEFAULT_BACKEND
+
+        questions = load_questions(args.questions)
+        store, build_row = build(index_store.scan_documents())
+        rows = [build_row]
+        retrieval_rows, details = evaluate(store, questions, sorted(set(args.k)))
+        rows += retrieval_rows
+        if args.details:
+            rows += details
+        if args.answers:
+            rows.append(answer_path(questions[:args.answers], args.timeout))
+
+    header = {
+        "commit": git_commit(),
+        "backend": DEFAULT_BACKEND,
+        "model": index_store.EMBEDDING_MODEL,
+        "settings": index_store.settings_fingerprint()[:12],
+    }
+    if args.json:
+        for row in rows:
+            print(json.dumps({**header, **row}))
+        return
+
+    build_row = rows[0]
+    print(f"commit {header['commit']} · backend {header['backend']} · settings {header['settings']}")
+    print(f"index: {build_row['documents']} PDFs, {build_row['chunks']} chunks "
+          f"(mean {build_row['mean_chunk_chars']:.0f} chars) built in {build_row['build_s']:.1f}s, "
+          f"{build_row['chunks_per_sec']} chunks/sec embedded, loaded in {build_row['load_ms']:.0f} ms, "
+          f"{build_row['index_mb']} MB")
+    for row in rows:
+        if row["kind"] == "embed_query":
+            print(f"query embedding: p50 {row['p50_ms']:.1f} ms, p95 {row['p95_ms']:.1f} ms")
+
+    ks = sorted(set(args.k))
+    recall_header = " ".join(f"{f'R@{k}':>6}" for k in ks)
+    print(f"{'mode':<8} {recall_header} {'MRR':>6} {'p50 ms':>8} {'p95 ms':>8} {'ctx chars':>10}")
+    for row in rows:
+        if row["kind"] == "retrieval":
+            recalls = " ".join(f"{row[f'recall@{k}']:>6.2f}" for k in ks)
+            print(f"{row['mode']:<8} {recalls} {row[f'mrr@{max(ks)}']:>6.3f} {row['p50_ms']:>8.2f} "
+                  f"{row['p95_ms']:>8.2f} {row[f'context_chars@{APP_CONTEXT_K}']:>10.0f}")
+        elif row["kind"] == "question":
+            print(f"  {row['mode']:<8} {row['id']:<26} rank {row['rank'] or '-'}")
+        elif row["kind"] == "answers":
+            print(f"answers: {row['questions']} turns, {row['errors']} errors, outcomes {row['outcomes']}, "
+                  f"turn p50 {row['turn_p50_ms']:.0f} ms, TTFT p50 {row['ttft_p50_ms']} ms, "
+                  f"prompt ~{row['mean_prompt_tokens']} tokens")
+
+
+if __name__ == "__main__":
+    main()
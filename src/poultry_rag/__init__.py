@@ -1,2 +1,5 @@
-def main() -> None:
-    print("Hello from poultry-rag!")
+def main(argv=None) -> None:
+    # Imported on call: the CLI puts this folder on sys.path, which only the CLI should do
+    from poultry_rag.cli import main as cli_main
+
+    cli_main(argv)
@@ -0,0 +1,164 @@
+import json
+import os
+
+import numpy as np
+
+from vector_math import kmeans
+
+# ✅ ANN Settings
+# "auto" uses exact search for small corpora and IVF above ANN_MIN_VECTORS
+ANN_BACKEND = os.getenv("ANN_BACKEND", "auto")  # "auto", "exact", "ivf" or "hnsw"
+ANN_MIN_VECTORS = int(os.getenv("ANN_MIN_VECTORS", "20000"))
+
+IVF_NLIST = int(os.getenv("IVF_NLIST", "0"))  # 0 = about 4 * sqrt(N) lists
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "0"))  # lists scanned per query; 0 = an eighth of them, at least 8
+
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "200"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "64"))  # candidates kept per query (recall vs latency)
+
+ANN_META_FILE = "ann.json"
+IVF_FILE = "ivf.npz"
+HNSW_FILE = "hnsw.bin"
+
+
+class IVFIndex:
+    """Inverted-file index: k-means lists over the vectors, only ``nprobe`` lists scanned per query."""
+
+    backend = "ivf"
+
+    def __init__(self, vectors, centroids, order, offsets, nprobe=IVF_NPROBE):
+        self.vectors = vectors
+        self.centroids = centroids
+        self.order = order  # row ids grouped by list
+        self.offsets = offsets  # list i is order[offsets[i]:offsets[i + 1]]
+        # A fixed handful of lists loses recall on real embeddings as nlist grows with the corpus
+        self.nprobe = nprobe or max(8, len(centroids) // 8)
+
+    @classmethod
+    def build(cls, vectors, nlist=IVF_NLIST):
+        nlist = nlist or max(1, int(4 * np.sqrt(len(vectors))))
+        centroids, assignment = kmeans(vectors, nlist)
+        order = np.argsort(assignment, kind="stable").astype(np.int64)
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=len(centroids)))])
+        return cls(vectors, centroids, order, offsets.astype(np.int64))
+
+    def search(self, query, k):
+        probes = np.argsort(-(self.centroids @ query))[:self.nprobe]
+        rows = np.concatenate([self.order[self.offsets[p]:self.offsets[p + 1]] for p in probes])
+        if not len(rows):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        rows.sort()  # sequential reads from the memory-mapped matrix
+        scores = np.asarray(self.vectors[rows]) @ query
+        k = min(k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return rows[top], scores[top]
+
+    def save(self, directory):
+        np.savez(os.path.join(directory, IVF_FILE), centroids=self.centroids, order=self.order, offsets=self.offsets)
+
+    @classmethod
+    def load(cls, vectors, directory):
+        with np.load(os.path.join(directory, IVF_FILE)) as saved:
+            return cls(vectors, saved["centroids"], saved["order"], saved["offsets"])
+
+
+class HNSWIndex:
+    """Graph index from the optional ``hnswlib`` package (``pip install poultry-rag[ann]``)."""
+
+    backend = "hnsw"
+
+    def __init__(self, index, ef_search=HNSW_EF_SEARCH):
+        self.index = index
+        self.ef_search = ef_search
+
+    @property
+    def ef_search(self):
+        return self._ef_search
+
+    @ef_search.setter
+    def ef_search(self, value):
+        self._ef_search = value
+        self.index.set_ef(value)
+
+    @classmethod
+    def build(cls, vectors, m=HNSW_M, ef_construction=HNSW_EF_CONSTRUCTION):
+        import hnswlib
+
+        index = hnswlib.Index(space="ip", dim=vectors.shape[1])
+        index.init_index(max_elements=len(vectors), M=m, ef_construction=ef_construction)
+        index.add_items(np.asarray(vectors, dtype=np.float32), np.arange(len(vectors)))
+        return cls(index)
+
+    def search(self, query, k):
+        k = min(k, self.index.get_current_count())
+        if k == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        self.index.set_ef(max(self.ef_search, k))
+        labels, distances = self.index.knn_query(query.reshape(1, -1), k=k)
+        # hnswlib's "ip" distance is 1 - dot product
+        return labels[0].astype(np.int64), (1.0 - distances[0]).astype(np.float32)
+
+    def save(self, directory):
+        self.index.save_index(os.path.join(directory, HNSW_FILE))
+
+    @classmethod
+    def load(cls, vectors, directory):
+        import hnswlib
+
+        index = hnswlib.Index(space="ip", dim=vectors.shape[1])
+        index.load_index(os.path.join(directory, HNSW_FILE), max_elements=len(vectors))
+        return cls(index)
+
+
+BACKENDS = {"ivf": IVFIndex, "hnsw": HNSWIndex}
+
+
+def _settings(num_vectors):
+    backend = ANN_BACKEND
+    if backend == "auto":
+        backend = "ivf" if num_vectors >= ANN_MIN_VECTORS else "exact"
+    params = {
+        "ivf": {"nlist": IVF_NLIST},
+        "hnsw": {"m": HNSW_M, "ef_construction": HNSW_EF_CONSTRUCTION},
+    }.get(backend, {})
+    return {"backend": backend, "params": params, "num_vectors": int(num_vectors)}
+
+
+def build_ann(vectors, directory):
+    """Build and save the configured ANN structure next to the embeddings (None for exact search)."""
+    settings = _settings(len(vectors))
+    index = None
+    if settings["backend"] != "exact" and len(vectors):
+        index = BACKENDS[settings["backend"]].build(vectors, **settings["params"])
+        index.save(directory)
+    with open(os.path.join(directory, ANN_META_FILE), "w", encoding="utf-8") as file:
+        json.dump(settings, file)
+    return index
+
+
+def load_ann(vectors, directory):
+    """Load the saved ANN structure, rebuilding it if the configured backend or its build params changed."""
+    try:
+        with open(os.path.join(directory, ANN_META_FILE), "r", encoding="utf-8") as file:
+            saved = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        saved = None
+
+    if saved != _settings(len(vectors)):
+        return build_ann(vectors, directory)
+    if saved["backend"] == "exact":
+        return None
+    return BACKENDS[saved["backend"]].load(vectors, directory)
+
+
+def exact_search(vectors, query, k):
+    """Brute-force top-k by dot product (the ground truth for recall measurements)."""
+    if len(vectors) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    scores = np.asarray(vectors) @ query
+    k = min(k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return top, scores[top]
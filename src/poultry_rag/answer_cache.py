@@ -0,0 +1,146 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# ✅ Cache Settings
+CACHE_DIR = os.getenv("POULTRY_RAG_CACHE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+CACHE_FILE = os.path.join(CACHE_DIR, "answer_cache.json")
+DEFAULT_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))
+DEFAULT_MAX_SIZE = int(os.getenv("ANSWER_CACHE_MAX_SIZE", "500"))
+DEFAULT_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+
+class SemanticAnswerCache:
+    """Answers keyed by query embedding; a close enough query returns the stored entry.
+
+    Each entry keeps the full ``answer`` as shown and the bare ``kb_answer``
+    (the knowledge-base part, which is all the conversation memory keeps).
+
+    Entries expire after ``ttl_seconds`` and the least recently used entry is evicted
+    once ``max_size`` is reached. The cache is written to ``path`` after every insert.
+    """
+
+    def __init__(self, path=CACHE_FILE, threshold=DEFAULT_THRESHOLD, max_size=DEFAULT_MAX_SIZE,
+                 ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> {"vector", "query", "answer", "kb_answer", "created"}
+        self._matrix = None
+        self._keys = []
+        self._next_key = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def lookup(self, query_vector):
+        """Return ``{"query", "answer", "kb_answer"}`` for the most similar stored query, or None."""
+        with self._lock:
+            self._expire()
+            if not self._entries:
+                self.misses += 1
+                return None
+
+            scores = self._similarity_matrix() @ _unit(query_vector)
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            key = self._keys[best]
+            self._entries.move_to_end(key)
+            self.hits += 1
+            entry = self._entries[key]
+            return {"query": entry["query"], "answer": entry["answer"], "kb_answer": entry["kb_answer"]}
+
+    def store(self, query_vector, query, answer, kb_answer):
+        with self._lock:
+            self._expire()
+            key = self._next_key
+            self._next_key += 1
+            self._entries[key] = {
+                "vector": _unit(query_vector),
+                "query": query,
+                "answer": answer,
+                "kb_answer": kb_answer,
+                "created": time.time(),
+            }
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            self._matrix = None
+            self._save()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+            self._save()
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl_seconds
+        expired = [key for key, entry in self._entries.items() if entry["created"] < cutoff]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._matrix = None
+
+    def _similarity_matrix(self):
+        if self._matrix is None:
+            self._keys = list(self._entries)
+            self._matrix = np.vstack([self._entries[key]["vector"] for key in self._keys])
+        return self._matrix
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                saved = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+
+        for entry in saved.get("entries", []):
+            # Entries from before kb_answer was stored (with the old indented template) are dropped
+            if "kb_answer" not in entry:
+                continue
+            self._entries[self._next_key] = {
+                "vector": np.asarray(entry["vector"], dtype=np.float32),
+                "query": entry["query"],
+                "answer": entry["answer"],
+                "kb_answer": entry["kb_answer"],
+                "created": entry["created"],
+            }
+            self._next_key += 1
+        self._expire()
+
+    def _save(self):
+        payload = {
+            "entries": [
+                {**entry, "vector": entry["vector"].tolist()}
+                for entry in self._entries.values()
+            ]
+        }
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(payload, file)
+        os.replace(tmp_path, self.path)
+
+
+def _unit(vector):
+    vector = np.asarray(vector, dtype=np.float32).ravel()
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
@@ -0,0 +1,130 @@
+import json
+import os
+import re
+from collections import Counter
+
+import numpy as np
+
+# ✅ BM25 Settings
+K1 = 1.5
+B = 0.75
+
+POSTINGS_FILE = "bm25_postings.npz"
+VOCAB_FILE = "bm25_vocab.json"
+
+# Keeps drug names, strains and doses ("h9n2", "la-sota", "0.5ml/l") together as one token
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.\-/][a-z0-9]+)*")
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "for", "from", "how", "i", "in",
+    "is", "it", "my", "of", "on", "or", "should", "that", "the", "this", "to", "was", "what",
+    "when", "which", "with", "you", "your",
+}
+
+
+def tokenize(text):
+    """Lowercase tokens without stopwords; compound tokens ("la-sota", "nd/ib") also yield their parts."""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        tokens.append(token)
+        parts = re.split(r"[.\-/]", token)
+        if len(parts) > 1:
+            tokens.extend(part for part in parts if part and part not in STOPWORDS)
+    return tokens
+
+
+class BM25Index:
+    """Inverted index with precomputed BM25 weights stored as CSR postings.
+
+    ``indptr[t]:indptr[t + 1]`` slices ``doc_ids``/``weights`` for term ``t``, so a
+    query only touches the postings of its own terms.
+    """
+
+    def __init__(self, vocab, indptr, doc_ids, weights, num_docs):
+        self.vocab = vocab
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.num_docs = num_docs
+
+    @classmethod
+    def build(cls, texts, k1=K1, b=B):
+        doc_terms = [Counter(tokenize(text)) for text in texts]
+        lengths = np.array([sum(terms.values()) for terms in doc_terms], dtype=np.float32)
+        avg_length = float(lengths.mean()) if len(lengths) and lengths.mean() > 0 else 1.0
+
+        postings = {}
+        for doc_id, terms in enumerate(doc_terms):
+            for term, tf in terms.items():
+                postings.setdefault(term, []).append((doc_id, tf))
+
+        vocab = {term: i for i, term in enumerate(sorted(postings))}
+        indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        doc_ids, weights = [], []
+        num_docs = len(texts)
+
+        for term, term_id in vocab.items():
+            entries = postings[term]
+            idf = np.log(1 + (num_docs - len(entries) + 0.5) / (len(entries) + 0.5))
+            ids = np.array([doc_id for doc_id, _ in entries], dtype=np.int32)
+            tf = np.array([count for _, count in entries], dtype=np.float32)
+            norm = k1 * (1 - b + b * lengths[ids] / avg_length)
+            doc_ids.append(ids)
+            weights.append((idf * tf * (k1 + 1) / (tf + norm)).astype(np.float32))
+            indptr[term_id + 1] = indptr[term_id] + len(entries)
+
+        return cls(
+            vocab,
+            indptr,
+            np.concatenate(doc_ids) if doc_ids else np.zeros(0, dtype=np.int32),
+            np.concatenate(weights) if weights else np.zeros(0, dtype=np.float32),
+            num_docs,
+        )
+
+    def search(self, query, k=10):
+        """Return ``(doc indices, scores)`` of the top-k chunks for ``query``."""
+        term_ids = {self.vocab[token] for token in tokenize(query) if token in self.vocab}
+        if not term_ids:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        # Sum every matched posting into a dense score array in one pass
+        spans = [slice(self.indptr[term_id], self.indptr[term_id + 1]) for term_id in term_ids]
+        scores = np.bincount(
+            np.concatenate([self.doc_ids[span] for span in spans]),
+            weights=np.concatenate([self.weights[span] for span in spans]),
+            minlength=self.num_docs,
+        ).astype(np.float32)
+
+        # BM25 weights are positive, so exactly the matched chunks score above zero
+        ids = np.flatnonzero(scores)
+        values = scores[ids]
+        k = min(k, len(ids))
+        top = np.argpartition(-values, k - 1)[:k]
+        top = top[np.argsort(-values[top])]
+        return ids[top], values[top]
+
+    def save(self, directory):
+        np.savez(
+            os.path.join(directory, POSTINGS_FILE),
+            indptr=self.indptr, doc_ids=self.doc_ids, weights=self.weights,
+            num_docs=np.array(self.num_docs),
+        )
+        with open(os.path.join(directory, VOCAB_FILE), "w", encoding="utf-8") as file:
+            json.dump(self.vocab, file)
+
+    @classmethod
+    def load(cls, directory):
+        postings_path = os.path.join(directory, POSTINGS_FILE)
+        vocab_path = os.path.join(directory, VOCAB_FILE)
+        if not (os.path.exists(postings_path) and os.path.exists(vocab_path)):
+            return None
+        with np.load(postings_path) as postings, open(vocab_path, "r", encoding="utf-8") as file:
+            return cls(
+                json.load(file),
+                postings["indptr"],
+                postings["doc_ids"],
+                postings["weights"],
+                int(postings["num_docs"]),
+            )
@@ -0,0 +1,268 @@
+import re
+from collections import Counter
+
+# ✅ Layout Settings
+HEADING_SIZE_RATIO = 1.15  # a line this much larger than body text is a heading
+HEADING_MAX_CHARS = 80  # also the cap for a heading merged from several lines
+MARGIN_RATIO = 0.07  # running headers and page numbers live in the top/bottom 7% of a page
+TABLE_MIN_FILL = 0.5  # share of non-empty cells; sparser "tables" are charts or page decoration
+BOLD_FLAG = 16
+BULLETS = ("•", "–", "-", "▪", "◦", "*")
+HEADING_SEPARATOR = " › "
+MAX_HEADING_DEPTH = 3
+MIN_CHILD_TEXT_RATIO = 0.5  # share of a child left for text however long its heading path is
+SECTION_NUMBER = re.compile(r"^\d+(\.\d+)+$")  # "14.1", printed as its own line before the title
+
+
+def _is_bold(span):
+    return bool(span["flags"] & BOLD_FLAG) or "bold" in span["font"].lower()
+
+
+def _line_text(line):
+    return re.sub(r"\s+", " ", "".join(span["text"] for span in line["spans"])).strip()
+
+
+def body_font_size(doc):
+    """Most common font size, weighted by characters; everything is measured against it."""
+    sizes = Counter()
+    for page in doc:
+        for block in page.get_text("dict")["blocks"]:
+            for line in block.get("lines", []):
+                for span in line["spans"]:
+                    sizes[round(span["size"], 1)] += len(span["text"].strip())
+    return sizes.most_common(1)[0][0] if sizes else 0.0
+
+
+def heading_rank(line, body_size):
+    """Sort key for a heading line (smaller = higher level), or None for body text."""
+    text = _line_text(line)
+    spans = [span for span in line["spans"] if span["text"].strip()]
+    if not spans or not 2 <= len(text) <= HEADING_MAX_CHARS:
+        return None
+    if not re.search(r"[A-Za-z]", text) and not SECTION_NUMBER.match(text):
+        return None
+    if text.startswith(BULLETS) or text.endswith((".", ",", ";")):
+        return None
+    size = max(span["size"] for span in spans)
+    if size < body_size * HEADING_SIZE_RATIO and not all(_is_bold(span) for span in spans):
+        return None
+    letters = re.sub(r"[^A-Za-z]", "", text)
+    return -round(size), 0 if letters.isupper() else 1
+
+
+def _in_margin(bbox, height):
+    return bbox[3] <= height * MARGIN_RATIO or bbox[1] >= height * (1 - MARGIN_RATIO)
+
+
+def _table_text(table):
+    """Rows as ``cell | cell`` lines; merged cells keep their line breaks as ``; ``."""
+    rows = []
+    for row in table.extract():
+        cells = [re.sub(r"\s*\n\s*", "; ", cell.strip()) for cell in row if cell and cell.strip()]
+        if cells:
+            rows.append(" | ".join(cells))
+    return "\n".join(rows)
+
+
+def _real_tables(page):
+    tables = []
+    for table in page.find_tables().tables:
+        cells = [cell for row in table.extract() for cell in row]
+        filled = sum(1 for cell in cells if cell and cell.strip())
+        if cells and filled / len(cells) >= TABLE_MIN_FILL:
+            tables.append(table)
+    return tables
+
+
+def _inside(bbox, rect):
+    x, y = (bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2
+    return rect[0] <= x <= rect[2] and rect[1] <= y <= rect[3]
+
+
+def page_units(page, body_size, detect_tables=True):
+    """Yield ``("heading", rank, text)``, ``("text", None, text)`` and ``("table", None, text)`` in reading order.
+
+    Page numbers and running headers in the margins are dropped, and the lines
+    of a detected table are replaced by the table as a single unit.
+    """
+    height = page.rect.height
+    tables = _real_tables(page) if detect_tables else []
+    emitted = set()
+    paragraph = []
+
+    def flush():
+        if paragraph:
+            text = " ".join(paragraph).replace(" \n", "\n").strip()
+            paragraph.clear()
+            return text
+        return None
+
+    for block in page.get_text("dict")["blocks"]:
+        for line in block.get("lines", []):
+            text = _line_text(line)
+            if not text or text.isdigit() or _in_margin(line["bbox"], height):
+                continue
+            table_index = next((i for i, table in enumerate(tables) if _inside(line["bbox"], table.bbox)), None)
+            if table_index is not None:
+                if table_index not in emitted:
+                    emitted.add(table_index)
+                    pending = flush()
+                    if pending:
+                        yield "text", None, pending
+                    yield "table", None, _table_text(tables[table_index])
+                continue
+            rank = heading_rank(line, body_size)
+            if rank is not None:
+                pending = flush()
+                if pending:
+                    yield "text", None, pending
+                yield "heading", rank, text
+                continue
+            paragraph.append(("\n" + text) if text.startswith(BULLETS) else text)
+        pending = flush()
+        if pending:
+            yield "text", None, pending
+
+    for i, table in enumerate(tables):
+        if i not in emitted:
+            yield "table", None, _table_text(table)
+
+
+def _split_text(text, size):
+    """Split an oversized unit at sentence (or row) boundaries, then at words."""
+    size = max(1, size)  # every cut must make progress
+    pieces = re.split(r"(?<=[.!?])\s+|\n", text)
+    parts, current = [], ""
+    for piece in pieces:
+        while len(piece) > size:
+            cut = piece.rfind(" ", 0, size)
+            cut = cut if cut > 0 else size
+            if current:
+                parts.append(current)
+                current = ""
+            parts.append(piece[:cut])
+            piece = piece[cut:].strip()
+        if current and len(current) + 1 + len(piece) > size:
+            parts.append(current)
+            current = piece
+        else:
+            current = f"{current} {piece}".strip() if current else piece
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _split_table(text, size):
+    """Split a long table by rows, repeating its first row as the header."""
+    rows = text.split("\n")
+    header, parts, current = rows[0], [], []
+    if len(header) > size // 2:
+        return _split_text(text, size)
+    row_size = size - len(header) - 1
+    rows = [piece for row in rows[1:] for piece in (_split_text(row, row_size) if len(row) > row_size else [row])]
+    for row in rows:
+        if current and len("\n".join([header, *current, row])) > size:
+            parts.append("\n".join([header, *current]))
+            current = []
+        current.append(row)
+    parts.append("\n".join([header, *current]))
+    return parts
+
+
+def document_units(path, detect_tables=True):
+    """``(kind, page, heading path, text)`` for every paragraph and table of a PDF."""
+    import pymupdf
+
+    doc = pymupdf.open(path)
+    try:
+        body_size = body_font_size(doc)
+        headings = []  # stack of (rank, text)
+        units = []
+        for page_number, page in enumerate(doc):
+            for kind, rank, text in page_units(page, body_size, detect_tables):
+                if kind == "heading":
+                    # A wrapped heading (same style) or a section number and its title are one heading
+                    follows_heading = units and units[-1][0] == "heading" and units[-1][1] == page_number
+                    previous = headings[-1] if follows_heading and headings else None
+                    # Bold body text and chart labels can look like a run of headings; stop merging at the cap
+                    fits = previous and len(previous[1]) + 1 + len(text) <= HEADING_MAX_CHARS
+                    if fits and (previous[0] == rank or SECTION_NUMBER.match(previous[1])):
+                        headings.pop()
+                        text = f"{previous[1]} {text}"
+                    while headings and headings[-1][0] >= rank:
+                        headings.pop()
+                    headings.append((rank, text))
+                    units.append(("heading", page_number, None, text))
+                    continue
+                path_text = HEADING_SEPARATOR.join(text for _, text in headings[-MAX_HEADING_DEPTH:])
+                units.append((kind, page_number, path_text, text))
+        return [unit for unit in units if unit[0] != "heading"]
+    finally:
+        doc.close()
+
+
+def _section(heading):
+    """The enclosing section of a heading path, e.g. the disease for "Disease › Diagnosis"."""
+    return heading.rsplit(HEADING_SEPARATOR, 1)[0] if HEADING_SEPARATOR in heading else heading
+
+
+def layout_chunks(path, child_size, parent_size, detect_tables=True):
+    """Structure-aware chunks of one PDF for parent/child retrieval.
+
+    Returns ``(children, parents)`` as ``{"text", "metadata"}`` dicts. A parent is
+    consecutive subsections of one section (e.g. the cause, signs and diagnosis of
+    one disease), at most ``parent_size`` characters, possibly across pages.
+    Children are the small pieces that get embedded: they never cross a page, a
+    heading or a table boundary, carry their heading path as a prefix, and name
+    their parent in ``metadata["parent"]``.
+    """
+    units = []
+    for kind, page, heading, text in document_units(path, detect_tables):
+        limit = max(child_size - len(heading) - 1, int(child_size * MIN_CHILD_TEXT_RATIO))
+        split = _split_table if kind == "table" else _split_text
+        units.extend((kind, page, heading, part) for part in (split(text, limit) if len(text) > limit else [text]))
+
+    children, parents = [], []
+    group = []
+
+    def close_parent():
+        if not group:
+            return
+        section = _section(group[0][2])
+        pages = sorted({unit[1] for unit in group})
+        lines, heading = [section], section
+        for unit in group:
+            if unit[2] != heading:
+                heading = unit[2]
+                lines.append(heading[len(section):].lstrip(HEADING_SEPARATOR.strip() + " ") or heading)
+            lines.append(unit[3])
+        parent_index = len(parents)
+        parents.append({
+            "text": "\n".join(filter(None, lines)),
+            "metadata": {"source": path, "page": pages[0], "pages": pages, "heading": section},
+        })
+
+        current = []
+        for unit in group + [None]:
+            if current and (unit is None or unit[:3] != current[0][:3]
+                            or len("\n".join(u[3] for u in current + [unit])) + len(unit[2]) >= child_size):
+                kind, page, heading = current[0][:3]
+                children.append({
+                    "text": "\n".join(filter(None, [heading, "\n".join(u[3] for u in current)])),
+                    "metadata": {"source": path, "page": page, "heading": heading, "kind": kind,
+                                 "parent": parent_index},
+                })
+                current = []
+            if unit is not None:
+                current.append(unit)
+        group.clear()
+
+    size = 0
+    for unit in units:
+        if group and (_section(unit[2]) != _section(group[0][2]) or size + len(unit[3]) > parent_size):
+            close_parent()
+            size = 0
+        group.append(unit)
+        size += len(unit[3]) + 2
+    close_parent()
+    return children, parents
@@ -0,0 +1,117 @@
+import argparse
+import os
+import sys
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _ingest(args):
+    from ingest import sync_index
+
+    engine_options = {"pool": args.pool}
+    if args.batch_size:
+        engine_options["batch_size"] = args.batch_size
+    if args.workers:
+        engine_options["workers"] = args.workers
+
+    report = sync_index(docs_dir=args.docs, dry_run=args.dry_run, **engine_options)
+    for label in ("added", "modified", "removed"):
+        for name in report[label]:
+            print(f"{label:>9}: {name}")
+    print(
+        f"✅ {len(report['unchanged'])} unchanged, "
+        f"{len(report['added']) + len(report['modified'])} (re)indexed, "
+        f"{len(report['removed'])} removed in {report['seconds']}s"
+        + (" (dry run)" if report["dry_run"] else "")
+    )
+    if "embedding" in report:
+        print(f"⚡ Embedded {report['embedding']}")
+
+
+def _scrape_eggs(args):
+    import time
+
+    from egg_store import scrape_egg_prices
+
+    while True:
+        try:
+            parsed, written = scrape_egg_prices()
+            print(f"✅ {parsed} egg prices scraped, {written} new or changed")
+        except Exception as e:
+            print(f"❌ Egg price scrape failed: {e}")
+            if not args.every:
+                raise SystemExit(1)
+        if not args.every:
+            return
+        time.sleep(args.every)
+
+
+def _monitor(args):
+    from monitor_website import run_monitor
+
+    run_monitor(args.targets, args.once, args.smtp_debug)
+
+
+def _traces(args):
+    import time
+
+    from tracing import summarize_file
+
+    since = time.time() - args.hours * 3600 if args.hours else None
+    summary = summarize_file(args.file, since)
+    if args.json:
+        import json
+
+        print(json.dumps(summary))
+        return
+    print(f"{'stage':<24} {'count':>7} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9}")
+    for name, row in summary.items():
+        print(f"{name:<24} {row['count']:>7} {row['errors']:>7} {row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f}")
+
+
+def main(argv=None):
+    # Modules in this package import each other as top-level names (that is how
+    # Streamlit runs main.py and pages/), so make the package folder importable.
+    # Done here rather than at import so importing poultry_rag leaves sys.path alone.
+    if APP_DIR not in sys.path:
+        sys.path.insert(0, APP_DIR)
+
+    from embedding_engine import DEFAULT_POOL
+    from egg_store import SCRAPE_INTERVAL
+    from index_store import DOCS_DIR
+    from monitor_website import add_arguments as add_monitor_arguments
+    from tracing import TRACE_FILE
+
+    parser = argparse.ArgumentParser(prog="poultry-rag", description="Poultry RAG maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="Sync the vector index with the PDFs in docs/")
+    ingest.add_argument("--docs", default=DOCS_DIR, help="Folder containing the knowledge-base PDFs")
+    ingest.add_argument("--dry-run", action="store_true", help="Only report what would change")
+    ingest.add_argument("--batch-size", type=int, help="Chunks per embedding batch")
+    ingest.add_argument("--workers", type=int, help="CPU threads or processes used for embedding")
+    ingest.add_argument("--pool", choices=["threads", "processes"], default=DEFAULT_POOL,
+                        help="Parallelise with torch threads or one process per worker")
+    ingest.set_defaults(handler=_ingest)
+
+    scrape = commands.add_parser("scrape-eggs", help="Append today's eggrates.pk prices to the local price store")
+    scrape.add_argument("--every", type=int, nargs="?", const=SCRAPE_INTERVAL, default=0, metavar="SECONDS",
+                        help=f"Keep running and scrape every SECONDS (default {SCRAPE_INTERVAL}); run once otherwise")
+    scrape.set_defaults(handler=_scrape_eggs)
+
+    monitor = commands.add_parser("monitor", help="Watch scraped pages for structural changes and send alerts")
+    add_monitor_arguments(monitor)
+    monitor.set_defaults(handler=_monitor)
+
+    traces = commands.add_parser("traces", help="p50/p95 latency per stage from the exported traces")
+    traces.add_argument("--file", default=TRACE_FILE, help="JSONL trace file")
+    traces.add_argument("--hours", type=float, help="Only spans from the last HOURS")
+    traces.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    traces.set_defaults(handler=_traces)
+
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+import os
+
+from dotenv import load_dotenv
+
+from offline import OFFLINE, PLACEHOLDER_SECRET
+
+# Load environment variables (Only once)
+load_dotenv()
+
+
+def get_secret(name):
+    """``name`` from the environment / .env, else from Streamlit secrets."""
+    value = os.getenv(name)
+    if value:
+        return value
+    if OFFLINE:
+        # Keyed code paths still run; the requests never leave the process
+        return PLACEHOLDER_SECRET
+    try:
+        import streamlit as st
+
+        return st.secrets.get(name)
+    except Exception:
+        # No secrets.toml, or not running under Streamlit (CLI, benchmarks)
+        return None
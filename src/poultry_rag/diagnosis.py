@@ -0,0 +1,233 @@
+import io
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from PIL import Image, ImageOps
+
+from gemini import generate_content, generate_text
+
+# ✅ Diagnosis Pipeline Settings
+MAX_SIDE = int(os.getenv("DIAGNOSIS_MAX_SIDE", "1024"))  # longest edge sent to Gemini, in pixels
+JPEG_QUALITY = int(os.getenv("DIAGNOSIS_JPEG_QUALITY", "85"))
+HASH_DISTANCE = int(os.getenv("DIAGNOSIS_HASH_DISTANCE", "8"))  # of 64 bits; up to this photos count as duplicates
+CACHE_SIZE = int(os.getenv("DIAGNOSIS_CACHE_SIZE", "2000"))
+CACHE_FILE = os.path.join(
+    os.getenv("POULTRY_RAG_CACHE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache"),
+    "diagnoses.json",
+)
+
+# Batch mode: parallel Gemini calls and the request budget they share
+BATCH_CONCURRENCY = int(os.getenv("DIAGNOSIS_CONCURRENCY", "4"))
+REQUESTS_PER_MINUTE = int(os.getenv("DIAGNOSIS_RPM", "60"))
+MAX_RETRIES = 4
+
+DIAGNOSIS_PROMPT = "Analyze this image and diagnose any poultry disease. Provide possible symptoms and treatments."
+
+FLOCK_SUMMARY_PROMPT = (
+    "You are a poultry veterinarian. Below are AI diagnoses of {count} photos of birds from the same flock. "
+    "Write a flock-level summary: the most likely diseases and roughly how many photographed birds show signs "
+    "of each, how urgent the situation is, and the recommended treatment, isolation and biosecurity actions "
+    "for the whole house.\n\n{diagnoses}"
+)
+
+
+def preprocess_image(image, max_side=MAX_SIDE, quality=JPEG_QUALITY):
+    """Upright, RGB, downsized JPEG bytes of ``image`` ready for upload."""
+    image = ImageOps.exif_transpose(image).convert("RGB")
+    image.thumbnail((max_side, max_side), Image.LANCZOS)
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality, optimize=True)
+    return buffer.getvalue(), image.size
+
+
+def dhash(image, size=8):
+    """64-bit difference hash: near-identical photos differ in only a few bits."""
+    # BOX averages every source pixel and is much cheaper than LANCZOS on full-size photos
+    pixels = list(ImageOps.exif_transpose(image).convert("L").resize((size + 1, size), Image.BOX).getdata())
+    value = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            right = pixels[row * (size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+class DiagnosisCache:
+    """Stored diagnoses looked up by perceptual hash (Hamming distance), persisted as JSON."""
+
+    def __init__(self, path=CACHE_FILE, max_distance=HASH_DISTANCE, max_size=CACHE_SIZE):
+        self.path = path
+        self.max_distance = max_distance
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = []  # [{"hash", "diagnosis", "created"}], oldest first
+        self._lock = threading.Lock()
+        self._load()
+
+    def lookup(self, image_hash):
+        with self._lock:
+            best = None
+            for entry in self._entries:
+                distance = (entry["hash"] ^ image_hash).bit_count()
+                if distance <= self.max_distance and (best is None or distance < best[0]):
+                    best = (distance, entry)
+            if best is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return best[1]["diagnosis"]
+
+    def store(self, image_hash, diagnosis):
+        with self._lock:
+            self._entries.append({"hash": image_hash, "diagnosis": diagnosis, "created": time.time()})
+            del self._entries[:-self.max_size]
+            self._save()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                self._entries = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._entries = []
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(self._entries, file)
+        os.replace(tmp_path, self.path)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DiagnosisCache()
+    return _cache
+
+
+def diagnose_image(image, generate, cache=None):
+    """Diagnose a PIL image; returns ``(diagnosis, metrics)``.
+
+    ``generate(prompt, image_part) -> str`` is the Gemini call. Repeated or
+    near-duplicate photos are answered from the perceptual-hash cache.
+    """
+    cache = cache or get_cache()
+    started = time.perf_counter()
+    metrics = {"original_size": list(image.size), "cache_hit": False, "upload_bytes": 0}
+
+    image_hash = dhash(image)
+    cached = cache.lookup(image_hash)
+    if cached is not None:
+        metrics.update(cache_hit=True, latency_ms=round((time.perf_counter() - started) * 1000, 1))
+        return cached, metrics
+
+    jpeg, sent_size = preprocess_image(image)
+    metrics.update(
+        sent_size=list(sent_size),
+        upload_bytes=len(jpeg),
+        preprocess_ms=round((time.perf_counter() - started) * 1000, 1),
+    )
+
+    diagnosis = generate(DIAGNOSIS_PROMPT, {"mime_type": "image/jpeg", "data": jpeg})
+    metrics["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    cache.store(image_hash, diagnosis)
+    return diagnosis, metrics
+
+
+class RateLimiter:
+    """Spaces calls evenly so that at most ``per_minute`` start in any minute."""
+
+    def __init__(self, per_minute=REQUESTS_PER_MINUTE):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def _is_rate_limited(error):
+    return type(error).__name__ in ("ResourceExhausted", "TooManyRequests") or "429" in str(error)
+
+
+def _rate_limited(generate, limiter, max_retries=MAX_RETRIES):
+    """Wrap ``generate`` so it waits for the limiter and backs off when the API says 429."""
+    def call(*args):
+        for attempt in range(max_retries + 1):
+            limiter.acquire()
+            try:
+                return generate(*args)
+            except Exception as e:
+                if not _is_rate_limited(e) or attempt == max_retries:
+                    raise
+                time.sleep(2 ** attempt)
+    return call
+
+
+def diagnose_batch(images, generate, concurrency=BATCH_CONCURRENCY, requests_per_minute=REQUESTS_PER_MINUTE):
+    """Diagnose many photos; yields ``(name, diagnosis, metrics)`` as each one finishes.
+
+    ``images`` is a list of ``(name, opener)`` where ``opener()`` returns the PIL
+    image, so decoding also happens in the worker threads. Cache hits never wait
+    for the rate limiter. A failed photo yields ``diagnosis=None`` and
+    ``metrics["error"]``.
+    """
+    limited = _rate_limited(generate, RateLimiter(requests_per_minute))
+
+    def run(opener):
+        started = time.perf_counter()
+        try:
+            return diagnose_image(opener(), limited)
+        except Exception as e:
+            return None, {"error": str(e), "cache_hit": False, "upload_bytes": 0,
+                          "latency_ms": round((time.perf_counter() - started) * 1000, 1)}
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="diagnose") as pool:
+        futures = {pool.submit(run, opener): name for name, opener in images}
+        for future in as_completed(futures):
+            diagnosis, metrics = future.result()
+            yield futures[future], diagnosis, metrics
+
+
+def summarize_flock(results, generate_text):
+    """One flock-level assessment from ``[(name, diagnosis), ...]`` of the successful photos."""
+    diagnoses = "\n\n".join(f"Photo {name}:\n{diagnosis}" for name, diagnosis in results)
+    return generate_text(FLOCK_SUMMARY_PROMPT.format(count=len(results), diagnoses=diagnoses))
+
+
+# Poultry Disease Diagnosis using Gemini
+def _generate_diagnosis(prompt, image_part):
+    return generate_content("gemini-1.5-flash", [prompt, image_part]).text
+
+
+def diagnose_poultry_disease_with_metrics(image):
+    """Diagnosis plus per-request metrics (upload bytes, latency, cache hit)."""
+    return diagnose_image(image, _generate_diagnosis)
+
+
+def diagnose_poultry_disease(image):
+    return diagnose_poultry_disease_with_metrics(image)[0]
+
+
+def diagnose_poultry_disease_batch(images):
+    """Yield ``(name, diagnosis, metrics)`` for ``[(name, opener), ...]`` as each photo finishes."""
+    return diagnose_batch(images, _generate_diagnosis)
+
+
+def summarize_flock_diagnoses(results):
+    return summarize_flock(results, generate_text)
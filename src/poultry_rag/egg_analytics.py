@@ -0,0 +1,88 @@
+import sqlite3
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+# ✅ Price Analytics Settings
+ROLLING_DAYS = 7
+ANOMALY_WINDOW = 30  # days of history a price is compared against
+ANOMALY_Z = 3.0  # flag prices this many standard deviations from the recent mean
+MIN_HISTORY = 5  # fewer earlier observations than this are never flagged
+
+ANALYTICS_TABLE = "price_analytics"
+SERIES = ["city", "quantity"]
+
+
+def price_frame(conn):
+    """All stored prices as a typed frame sorted by city, quantity and day."""
+    frame = pd.read_sql_query("SELECT day, city, quantity, price_pkr FROM prices", conn)
+    frame["day"] = pd.to_datetime(frame["day"])
+    frame["price_pkr"] = frame["price_pkr"].astype("float64")
+    return frame.sort_values(SERIES + ["day"], ignore_index=True)
+
+
+def compute_analytics(frame):
+    """Add rolling, day-over-day, spread and anomaly columns to ``price_frame`` output.
+
+    Every column is computed per (city, quantity) series or per (day, quantity)
+    cross-section with grouped vector operations, never row by row.
+    """
+    frame = frame.copy()
+    series = frame.groupby(SERIES, sort=False, observed=True)["price_pkr"]
+    # Windows are calendar days on the day index, so a missed scrape does not stretch them.
+    # The frame is sorted by series and day, so grouped results line up with its rows.
+    by_day = frame.set_index("day").groupby(SERIES, sort=False, observed=True)["price_pkr"]
+
+    frame[f"rolling_{ROLLING_DAYS}d"] = by_day.rolling(f"{ROLLING_DAYS}D", min_periods=1).mean().to_numpy()
+    frame["change"] = series.diff()
+    frame["change_pct"] = series.pct_change(fill_method=None) * 100
+
+    # Compare each price with the days before it, so a spike does not hide itself
+    window = by_day.rolling(f"{ANOMALY_WINDOW}D", min_periods=MIN_HISTORY, closed="left")
+    mean = window.mean().to_numpy()
+    std = window.std().to_numpy()
+    frame["zscore"] = (frame["price_pkr"] - mean) / pd.Series(std, index=frame.index).replace(0, np.nan)
+    frame["anomaly"] = frame["zscore"].abs() >= ANOMALY_Z
+
+    # City-to-city spread: how far each city is from the median city that day
+    cross_section = frame.groupby(["day", "quantity"], sort=False)["price_pkr"]
+    frame["median_all_cities"] = cross_section.transform("median")
+    frame["spread_vs_median"] = frame["price_pkr"] - frame["median_all_cities"]
+    frame["spread_pct"] = frame["spread_vs_median"] / frame["median_all_cities"] * 100
+    return frame
+
+
+def materialize(store):
+    """Recompute the analytics table from the store's prices; call after new data lands."""
+    with closing(sqlite3.connect(store.path, timeout=10)) as conn:
+        frame = compute_analytics(price_frame(conn))
+        frame["day"] = frame["day"].dt.strftime("%Y-%m-%d")
+        frame.to_sql(ANALYTICS_TABLE, conn, if_exists="replace", index=False)
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {ANALYTICS_TABLE}_city_day ON {ANALYTICS_TABLE} (city, day)")
+        conn.commit()
+    return len(frame)
+
+
+def load_analytics(store, city=None):
+    """Materialized analytics (one city or all), building them once if the table is missing."""
+    query = f"SELECT * FROM {ANALYTICS_TABLE}" + (" WHERE city = ?" if city else "") + " ORDER BY city, quantity, day"
+    with closing(sqlite3.connect(store.path, timeout=10)) as conn:
+        try:
+            frame = pd.read_sql_query(query, conn, params=(city,) if city else None)
+        except pd.errors.DatabaseError:
+            frame = None
+    if frame is None:
+        materialize(store)
+        return load_analytics(store, city)
+    frame["day"] = pd.to_datetime(frame["day"])
+    frame["anomaly"] = frame["anomaly"].astype(bool)
+    return frame
+
+
+def latest_spreads(frame):
+    """City × quantity table of the newest day's spread versus the median city, in percent."""
+    if frame.empty:
+        return frame
+    latest = frame[frame["day"] == frame["day"].max()]
+    return latest.pivot_table(index="city", columns="quantity", values="spread_pct", observed=True).round(1)
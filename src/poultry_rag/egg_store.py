@@ -0,0 +1,214 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from contextlib import closing
+from datetime import date
+
+# ✅ Egg Price Store Settings
+EGG_RATES_URL = "https://eggrates.pk/"
+SCRAPE_INTERVAL = int(os.getenv("EGG_SCRAPE_INTERVAL", str(6 * 60 * 60)))  # seconds between scheduled scrapes
+DB_FILE = os.path.join(
+    os.getenv("POULTRY_RAG_CACHE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache"),
+    "egg_prices.sqlite",
+)
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
+DEFAULT_CITY = "Average Egg Rates"  # tables without a preceding <h3>
+PRICE_NUMBER = re.compile(r"\d+(?:\.\d+)?")  # "Rs. 1,250/-" -> 1250
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scrapes (
+    scraped_at REAL PRIMARY KEY,
+    day TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    rows_written INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS prices (
+    day TEXT NOT NULL,
+    city TEXT NOT NULL,
+    quantity TEXT NOT NULL,
+    price TEXT NOT NULL,
+    price_pkr REAL,
+    scraped_at REAL NOT NULL,
+    PRIMARY KEY (day, city, quantity)
+);
+CREATE INDEX IF NOT EXISTS prices_city_day ON prices (city, day);
+"""
+
+
+def parse_price(text):
+    """PKR amount in a scraped price string, or None."""
+    match = PRICE_NUMBER.search(text.replace(",", ""))
+    return float(match.group()) if match else None
+
+
+def _parse_selectolax(html):
+    from selectolax.lexbor import LexborHTMLParser
+
+    rows, city = [], DEFAULT_CITY
+    # A selector list matches in document order, so each table follows its <h3>
+    for node in LexborHTMLParser(html).css("h3, table.kb-table"):
+        if node.tag == "h3":
+            city = node.text(strip=True)
+            continue
+        for tr in node.css("tr")[1:]:  # Skip the header row
+            cells = tr.css("td")
+            if len(cells) >= 2:
+                rows.append((city, cells[0].text(strip=True), cells[1].text(strip=True)))
+    return rows
+
+
+def _parse_soup(html):
+    from bs4 import BeautifulSoup
+
+    try:
+        soup = BeautifulSoup(html, "lxml")
+    except Exception:
+        soup = BeautifulSoup(html, "html.parser")
+
+    rows = []
+    for table in soup.find_all("table", class_="kb-table"):
+        city_heading = table.find_previous("h3")
+        city = city_heading.text.strip() if city_heading else DEFAULT_CITY
+        for row in table.find_all("tr")[1:]:
+            columns = row.find_all("td")
+            if len(columns) >= 2:
+                rows.append((city, columns[0].text.strip(), columns[1].text.strip()))
+    return rows
+
+
+def parse_egg_prices(html):
+    """``[(city, quantity, price), ...]`` from the eggrates.pk ``kb-table`` tables.
+
+    Uses selectolax when installed (``pip install poultry-rag[scrape]``), else
+    BeautifulSoup with lxml or the stdlib parser.
+    """
+    try:
+        return _parse_selectolax(html)
+    except ImportError:
+        return _parse_soup(html)
+
+
+class EggPriceStore:
+    """Daily egg price snapshots per city in SQLite; one row per (day, city, quantity)."""
+
+    def __init__(self, path=DB_FILE):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with closing(self._connect()) as conn:
+            # WAL lets the page read while the scraper writes
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(prices)")}
+            if "price_pkr" not in columns:
+                # Stores created before prices were parsed at write time
+                conn.execute("ALTER TABLE prices ADD COLUMN price_pkr REAL")
+                conn.executemany(
+                    "UPDATE prices SET price_pkr = ? WHERE rowid = ?",
+                    [(parse_price(price), rowid) for rowid, price in conn.execute("SELECT rowid, price FROM prices")],
+                )
+                conn.commit()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def last_scrape(self):
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT scraped_at, day, content_hash FROM scrapes ORDER BY scraped_at DESC LIMIT 1"
+            ).fetchone()
+        return dict(zip(("scraped_at", "day", "content_hash"), row)) if row else None
+
+    def append(self, rows, scraped_at=None):
+        """Record one scrape; returns how many price rows were written.
+
+        A scrape whose rows match the last one on the same day writes nothing
+        but the scrape record itself.
+        """
+        scraped_at = scraped_at or time.time()
+        day = date.fromtimestamp(scraped_at).isoformat()
+        content_hash = hashlib.sha256(json.dumps(sorted(rows)).encode("utf-8")).hexdigest()
+        last = self.last_scrape()
+        unchanged = last is not None and last["day"] == day and last["content_hash"] == content_hash
+
+        with closing(self._connect()) as conn, conn:
+            if not unchanged:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO prices (day, city, quantity, price, price_pkr, scraped_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [(day, city, quantity, price, parse_price(price), scraped_at) for city, quantity, price in rows],
+                )
+            written = 0 if unchanged else len(rows)
+            conn.execute(
+                "INSERT INTO scrapes (scraped_at, day, content_hash, rows_written) VALUES (?, ?, ?, ?)",
+                (scraped_at, day, content_hash, written),
+            )
+        return written
+
+    def latest(self):
+        """Most recent prices per city as ``[{"City", "Day", "Prices": [{"Quantity", "Price"}]}]``."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                """
+                SELECT p.city, p.day, p.quantity, p.price FROM prices p
+                JOIN (SELECT city, MAX(day) AS day FROM prices GROUP BY city) last
+                  ON p.city = last.city AND p.day = last.day
+                ORDER BY p.rowid
+                """
+            ).fetchall()
+
+        cities = {}
+        for city, day, quantity, price in rows:
+            entry = cities.setdefault(city, {"City": city, "Day": day, "Prices": []})
+            entry["Prices"].append({"Quantity": quantity, "Price": price})
+        return list(cities.values())
+
+    def cities(self):
+        with closing(self._connect()) as conn:
+            return [row[0] for row in conn.execute("SELECT DISTINCT city FROM prices ORDER BY city")]
+
+    def history(self, city, since=None):
+        """``[(day, quantity, price), ...]`` for one city, oldest first, optionally from ``since`` (ISO date)."""
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT day, quantity, price FROM prices WHERE city = ? AND day >= ? ORDER BY day, rowid",
+                (city, since or ""),
+            ).fetchall()
+
+
+def scrape_egg_prices(store=None, url=EGG_RATES_URL):
+    """Fetch eggrates.pk once and append the parsed prices to the store; returns ``(rows_parsed, rows_written)``."""
+    import http_client
+
+    store = store or EggPriceStore()
+    response = http_client.get(url, headers={"User-Agent": USER_AGENT})
+    rows = parse_egg_prices(response.text)
+    if not rows:
+        raise ValueError("No kb-table egg price tables found on the page")
+    written = store.append(rows)
+    if written:
+        from egg_analytics import materialize
+
+        materialize(store)
+    return len(rows), written
+
+
+def get_egg_prices():
+    """Latest egg prices per city from the local store (see ``poultry-rag scrape-eggs``).
+
+    The site is only contacted when the store is still empty.
+    """
+    try:
+        store = EggPriceStore()
+        egg_prices = store.latest()
+        if not egg_prices:
+            scrape_egg_prices(store)
+            egg_prices = store.latest()
+
+        return egg_prices if egg_prices else ["⚠️ No relevant results found."]
+
+    except Exception as e:
+        print(f"Error fetching egg prices: {e}")
+        return ["⚠️ Unable to fetch egg prices."]
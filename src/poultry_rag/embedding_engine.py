@@ -0,0 +1,126 @@
+import os
+import time
+
+from langchain_core.embeddings import Embeddings
+
+# ✅ Defaults (override with env vars or constructor arguments)
+DEFAULT_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+DEFAULT_WORKERS = int(os.getenv("EMBED_WORKERS", "0")) or os.cpu_count() or 1
+DEFAULT_POOL = os.getenv("EMBED_POOL", "threads")  # "threads" or "processes"
+DEFAULT_BACKEND = os.getenv("EMBED_BACKEND", "torch")  # "torch", "onnx", "onnx-int8" or "hashing" (no model)
+
+# Quantized export shipped in the sentence-transformers model repo (same MiniLM weights, int8)
+ONNX_INT8_FILE = os.getenv("EMBED_ONNX_FILE", "onnx/model_qint8_avx512_vnni.onnx")
+
+# Below this many texts a process pool costs more to start than it saves
+MIN_TEXTS_FOR_POOL = 256
+
+# Read by torch/MKL when a pool worker starts; left unset, every worker would use every core
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS")
+
+
+class EmbeddingEngine(Embeddings):
+    """Batched CPU embedder for bulk indexing that records its own throughput."""
+
+    def __init__(self, model_name, batch_size=DEFAULT_BATCH_SIZE, workers=DEFAULT_WORKERS,
+                 pool=DEFAULT_POOL, backend=DEFAULT_BACKEND):
+        if pool not in ("threads", "processes"):
+            raise ValueError(f"Unknown pool type: {pool}")
+        if backend not in ("torch", "onnx", "onnx-int8", "hashing"):
+            raise ValueError(f"Unknown embedding backend: {backend}")
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.workers = max(1, workers)
+        self.pool = pool
+        self.backend = backend
+        self.stats = {"chunks": 0, "seconds": 0.0, "chunks_per_sec": 0.0}
+        self._model = None
+        self._process_pool = None
+
+    @property
+    def model(self):
+        if self._model is None and self.backend == "hashing":
+            from offline import HashingEncoder
+
+            self._model = HashingEncoder()
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+
+            if self.pool == "threads":
+                import torch
+
+                torch.set_num_threads(self.workers)
+
+            if self.backend == "torch":
+                self._model = SentenceTransformer(self.model_name, device="cpu")
+            elif self.backend == "onnx":
+                self._model = SentenceTransformer(self.model_name, device="cpu", backend="onnx")
+            else:
+                self._model = SentenceTransformer(
+                    self.model_name, device="cpu", backend="onnx",
+                    model_kwargs={"file_name": ONNX_INT8_FILE}
+                )
+        return self._model
+
+    def embed_documents(self, texts):
+        texts = list(texts)
+        if not texts:
+            return []
+
+        start = time.perf_counter()
+        if (self.pool == "processes" and self.workers > 1 and len(texts) >= MIN_TEXTS_FOR_POOL
+                and self.backend != "hashing"):
+            if self._process_pool is None:
+                self._process_pool = self._start_process_pool()
+            vectors = self.model.encode_multi_process(
+                texts, self._process_pool, batch_size=self.batch_size, normalize_embeddings=True
+            )
+        else:
+            vectors = self.model.encode(
+                texts, batch_size=self.batch_size, normalize_embeddings=True, convert_to_numpy=True
+            )
+        self._record(len(texts), time.perf_counter() - start)
+        return vectors.tolist()
+
+    def _start_process_pool(self):
+        """Spawn one worker per ``workers``, each limited to its share of the cores."""
+        threads = str(max(1, (os.cpu_count() or 1) // self.workers))
+        saved = {name: os.environ.get(name) for name in THREAD_ENV_VARS}
+        os.environ.update({name: threads for name in THREAD_ENV_VARS})
+        try:
+            # Spawned workers copy the environment as it is right now
+            return self.model.start_multi_process_pool(["cpu"] * self.workers)
+        finally:
+            for name, value in saved.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+
+    def embed_query(self, text):
+        return self.model.encode([text], normalize_embeddings=True, convert_to_numpy=True)[0].tolist()
+
+    def _record(self, chunks, seconds):
+        self.stats["chunks"] += chunks
+        self.stats["seconds"] += seconds
+        if self.stats["seconds"] > 0:
+            self.stats["chunks_per_sec"] = round(self.stats["chunks"] / self.stats["seconds"], 1)
+
+    def describe(self):
+        return (
+            f"{self.stats['chunks']} chunks in {self.stats['seconds']:.2f}s "
+            f"({self.stats['chunks_per_sec']} chunks/sec, backend={self.backend}, "
+            f"pool={self.pool}, workers={self.workers}, batch_size={self.batch_size})"
+        )
+
+    def close(self):
+        if self._process_pool is not None:
+            self._model.stop_multi_process_pool(self._process_pool)
+            self._process_pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
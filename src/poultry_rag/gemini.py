@@ -0,0 +1,39 @@
+import threading
+
+from config import get_secret
+from offline import OFFLINE, StubGeminiModel
+from tracing import count, span
+
+# Gemini clients are built once per process and reused by every call.
+# google.generativeai is only imported when the first client is needed.
+_models = {}
+_lock = threading.Lock()
+
+
+def get_gemini_model(name):
+    with _lock:
+        if name not in _models and OFFLINE:
+            _models[name] = StubGeminiModel(name)
+        if name not in _models:
+            import google.generativeai as genai
+
+            if not _models:
+                genai.configure(api_key=get_secret("GOOGLE_API_KEY"))
+            _models[name] = genai.GenerativeModel(name)
+    return _models[name]
+
+
+def generate_content(model, contents):
+    """``generate_content`` on the shared client for ``model``, traced with its token usage."""
+    with span("gemini.generate", model=model) as call:
+        response = get_gemini_model(model).generate_content(contents)
+        usage = getattr(response, "usage_metadata", None)
+        if usage:
+            call.set(prompt_tokens=usage.prompt_token_count, output_tokens=usage.candidates_token_count)
+            count("gemini.prompt_tokens", usage.prompt_token_count)
+            count("gemini.output_tokens", usage.candidates_token_count)
+        return response
+
+
+def generate_text(prompt, model="gemini-2.0-flash"):
+    return generate_content(model, prompt).text
@@ -0,0 +1,119 @@
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from offline import OFFLINE, StubSession
+from tracing import count, span
+
+# ✅ Client Settings
+DEFAULT_TIMEOUT = (3.05, 10)  # (connect, read) seconds
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5  # 0.5s, 1s, 2s between attempts
+MAX_BACKOFF = 2  # seconds; also caps a server's Retry-After, which can ask for minutes
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Cache lifetimes for the endpoints we call
+WEATHER_TTL = 10 * 60
+SEARCH_TTL = 6 * 60 * 60
+
+
+class TTLCache:
+    """Small thread-safe LRU cache whose entries expire after a per-entry TTL."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+response_cache = TTLCache()
+
+
+class CappedRetry(Retry):
+    """``Retry`` that never waits longer than ``backoff_max``, whatever Retry-After says."""
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else min(retry_after, self.backoff_max)
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Process-wide keep-alive session with bounded retries and backoff."""
+    global _session
+    with _session_lock:
+        if _session is None and OFFLINE:
+            _session = StubSession()
+        if _session is None:
+            retry = CappedRetry(
+                total=MAX_RETRIES,
+                backoff_factor=BACKOFF_FACTOR,
+                backoff_max=MAX_BACKOFF,
+                status_forcelist=RETRY_STATUSES,
+                allowed_methods=frozenset({"GET", "HEAD"}),
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(pool_connections=20, pool_maxsize=50, max_retries=retry)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+    return _session
+
+
+def get(url, params=None, headers=None, timeout=DEFAULT_TIMEOUT, ttl=0, cache_key=None):
+    """GET through the pooled session and raise for HTTP errors.
+
+    With ``ttl`` > 0 a successful response is cached under ``cache_key``
+    (default: the URL and its parameters) for that many seconds.
+    """
+    parts = urlsplit(url)
+    with span("http.get", host=parts.netloc, path=parts.path) as call:
+        if ttl:
+            cache_key = cache_key or (url, tuple(sorted((params or {}).items())))
+            cached = response_cache.get(cache_key)
+            count("http.cache_hit" if cached is not None else "http.cache_miss")
+            if cached is not None:
+                call.set(cache_hit=True)
+                return cached
+
+        response = get_session().get(url, params=params, headers=headers, timeout=timeout)
+        call.set(status=response.status_code, bytes=len(response.content))
+        response.raise_for_status()
+
+        if ttl:
+            response_cache.set(cache_key, response, ttl)
+        return response
@@ -0,0 +1,77 @@
+import os
+
+# ✅ Hybrid Retrieval Settings
+CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))  # taken from each retriever before fusion
+RRF_K = 60
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_ENABLED = os.getenv("RERANK", "0") == "1"
+
+# Parent/child retrieval: small chunks are matched, their parent sections are returned
+CONTEXT_CHAR_BUDGET = int(os.getenv("CONTEXT_CHAR_BUDGET", "2000"))
+CHILDREN_PER_PARENT = 3  # chunks fetched per requested section, since siblings collapse into one
+
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    """Fuse several ranked lists of row indices; returns ``[(index, score), ...]`` best first."""
+    scores = {}
+    for ranking in rankings:
+        for rank, index in enumerate(ranking):
+            scores[int(index)] = scores.get(int(index), 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+_reranker = None
+
+
+def get_reranker():
+    """CPU cross-encoder, loaded on first use."""
+    global _reranker
+    if _reranker is None:
+        from sentence_transformers import CrossEncoder
+
+        _reranker = CrossEncoder(RERANK_MODEL, device="cpu")
+    return _reranker
+
+
+def hybrid_search(vectorstore, query, query_vector, k=3, candidates=CANDIDATES, rerank=RERANK_ENABLED):
+    """BM25 + dense retrieval fused with RRF, optionally re-ranked by a cross-encoder.
+
+    Falls back to dense search alone when the index has no BM25 postings.
+    """
+    dense_ids, _ = vectorstore.search_indices(query_vector, candidates)
+    rankings = [dense_ids]
+    if vectorstore.bm25 is not None:
+        sparse_ids, _ = vectorstore.bm25.search(query, candidates)
+        rankings.append(sparse_ids)
+
+    fused = [index for index, _ in reciprocal_rank_fusion(rankings)]
+    if rerank and len(fused) > 1:
+        pairs = [(query, vectorstore.texts[index]) for index in fused]
+        scores = get_reranker().predict(pairs)
+        fused = [index for _, index in sorted(zip(scores, fused), key=lambda item: item[0], reverse=True)]
+
+    return [vectorstore.document(index) for index in fused[:k]]
+
+
+def expand_to_parents(vectorstore, docs, k=3, max_chars=CONTEXT_CHAR_BUDGET):
+    """Swap ranked child chunks for their parent sections (small-to-big retrieval).
+
+    Each parent is used once, in the order of its best child. A parent that would
+    overflow ``max_chars`` is replaced by the child itself, and chunks without a
+    parent (recursive chunker) pass through unchanged.
+    """
+    results, seen, used = [], set(), 0
+    for doc in docs:
+        parent_id = doc.metadata.get("parent")
+        if parent_id is not None and parent_id in seen:
+            continue
+        parent = vectorstore.parent_document(parent_id) if parent_id is not None else None
+        chosen = parent if parent is not None and used + len(parent.page_content) <= max_chars else doc
+        if results and used + len(chosen.page_content) > max_chars:
+            continue
+        seen.add(parent_id)
+        results.append(chosen)
+        used += len(chosen.page_content)
+        if len(results) == k:
+            break
+    return results
@@ -0,0 +1,308 @@
+import hashlib
+import json
+import os
+import uuid
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+from ann_index import build_ann, exact_search, load_ann
+from bm25 import POSTINGS_FILE, VOCAB_FILE, BM25Index
+from chunking import HEADING_MAX_CHARS, layout_chunks
+from embedding_engine import DEFAULT_BACKEND, EmbeddingEngine
+from vector_math import kmeans, normalize as _normalize
+
+# ✅ Index Settings (changing any of these invalidates the stored index)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DOCS_DIR = os.path.join(BASE_DIR, "docs")
+INDEX_DIR = os.getenv("POULTRY_RAG_INDEX_DIR") or os.path.join(BASE_DIR, "index")
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L12-v2"
+
+# "layout": PyMuPDF headings/tables/pages, small chunks embedded, parent sections returned.
+# "recursive": the original fixed-size character splitter, kept for comparison.
+CHUNKER = os.getenv("CHUNKER", "layout")
+CHILD_CHUNK_SIZE = 500
+PARENT_CHUNK_SIZE = 1500
+DETECT_TABLES = os.getenv("CHUNK_TABLES", "1") == "1"
+CHUNK_SIZE = 1000  # recursive chunker only
+CHUNK_OVERLAP = 100
+
+EMBEDDINGS_FILE = "embeddings.npy"
+CHUNKS_FILE = "chunks.json"
+PARENTS_FILE = "parents.json"
+CENTROIDS_FILE = "centroids.npy"
+MANIFEST_FILE = "manifest.json"
+
+# Topic centroids of the corpus, used by the local relevance gate
+TOPIC_CLUSTERS = 16
+
+# Files derived from the combined chunks; a missing one triggers a rebuild
+DERIVED_FILES = [CENTROIDS_FILE, POSTINGS_FILE, VOCAB_FILE, PARENTS_FILE]
+
+
+class NumpyVectorStore(VectorStore):
+    """Cosine-similarity store over a (possibly memory-mapped) float32 matrix.
+
+    Searches are exact unless an ANN structure (see ``ann_index``) is attached.
+    ``parents`` maps a parent id to the section a chunk was cut from (see
+    ``chunking.layout_chunks``).
+    """
+
+    def __init__(self, embedding, vectors=None, texts=None, metadatas=None, ids=None, centroids=None, bm25=None,
+                 ann=None, parents=None):
+        self.embedding = embedding
+        self.centroids = centroids
+        self.bm25 = bm25
+        self.ann = ann
+        self.parents = parents or {}
+        self.vectors = vectors if vectors is not None else np.zeros((0, 0), dtype=np.float32)
+        self.texts = list(texts or [])
+        self.metadatas = list(metadatas or [{} for _ in self.texts])
+        self.ids = list(ids or [str(uuid.uuid4()) for _ in self.texts])
+
+    @property
+    def embeddings(self):
+        return self.embedding
+
+    def add_texts(self, texts, metadatas=None, ids=None, **kwargs):
+        texts = list(texts)
+        if not texts:
+            return []
+        metadatas = list(metadatas or [{} for _ in texts])
+        ids = list(ids or [str(uuid.uuid4()) for _ in texts])
+
+        new_vectors = _normalize(np.asarray(self.embedding.embed_documents(texts), dtype=np.float32))
+        self.vectors = new_vectors if len(self.texts) == 0 else np.vstack([self.vectors, new_vectors])
+        self.ann = None  # the ANN structure no longer covers every row
+        self.texts.extend(texts)
+        self.metadatas.extend(metadatas)
+        self.ids.extend(ids)
+        return ids
+
+    def search_indices(self, embedding, k=4):
+        """Return ``(row indices, cosine scores)`` of the k nearest chunks."""
+        query = _normalize(np.asarray(embedding, dtype=np.float32).reshape(1, -1))[0]
+        if self.ann is not None:
+            return self.ann.search(query, k)
+        return exact_search(self.vectors, query, k)
+
+    def similarity_search_with_score_by_vector(self, embedding, k=4, **kwargs):
+        indices, scores = self.search_indices(embedding, k)
+        return [(self.document(i), float(score)) for i, score in zip(indices, scores)]
+
+    def similarity_search_by_vector(self, embedding, k=4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, **kwargs)]
+
+    def similarity_search_with_score(self, query, k=4, **kwargs):
+        return self.similarity_search_with_score_by_vector(self.embedding.embed_query(query), k, **kwargs)
+
+    def similarity_search(self, query, k=4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+    def _select_relevance_score_fn(self):
+        # Vectors are unit length, so the dot product already is the cosine similarity
+        return lambda score: score
+
+    def document(self, i):
+        return Document(id=self.ids[i], page_content=self.texts[i], metadata=dict(self.metadatas[i]))
+
+    def parent_document(self, parent_id):
+        parent = self.parents.get(parent_id)
+        if parent is None:
+            return None
+        return Document(id=parent_id, page_content=parent["text"], metadata=dict(parent["metadata"]))
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, ids=None, **kwargs):
+        store = cls(embedding)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
+
+
+def get_embeddings(**engine_options):
+    """Query/document embedder shared by the app and the ingestion CLI."""
+    return EmbeddingEngine(EMBEDDING_MODEL, **engine_options)
+
+
+def scan_documents(docs_dir=DOCS_DIR):
+    """All PDFs in the knowledge-base folder, in a stable order."""
+    if not os.path.isdir(docs_dir):
+        return []
+    return sorted(
+        os.path.join(docs_dir, name)
+        for name in os.listdir(docs_dir)
+        if name.lower().endswith(".pdf")
+    )
+
+
+def settings_fingerprint():
+    """Hash of everything besides the PDF bytes that affects the stored vectors."""
+    settings = {
+        "model": EMBEDDING_MODEL,
+        # int8 ONNX vectors differ slightly from fp32 ones, so never mix them in one index
+        "backend": DEFAULT_BACKEND,
+        "chunker": CHUNKER,
+    }
+    if CHUNKER == "layout":
+        settings.update(child_size=CHILD_CHUNK_SIZE, parent_size=PARENT_CHUNK_SIZE, tables=DETECT_TABLES,
+                        heading_max_chars=HEADING_MAX_CHARS)
+    else:
+        settings.update(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def document_key(path):
+    """Content hash of one PDF combined with the chunking/model settings."""
+    return hashlib.sha256((file_sha256(path) + settings_fingerprint()).encode("utf-8")).hexdigest()
+
+
+def _chunk_pdf(path):
+    """``(chunks, parents)`` of one PDF as ``{"text", "metadata"}`` dicts."""
+    if CHUNKER == "layout":
+        return layout_chunks(path, CHILD_CHUNK_SIZE, PARENT_CHUNK_SIZE, DETECT_TABLES)
+
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    from langchain_community.document_loaders import PyPDFLoader
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    docs = splitter.split_documents(PyPDFLoader(path).load())
+    return [{"text": doc.page_content, "metadata": doc.metadata} for doc in docs], []
+
+
+def _shard_paths(key):
+    shard_dir = os.path.join(INDEX_DIR, "shards")
+    return os.path.join(shard_dir, f"{key}.npy"), os.path.join(shard_dir, f"{key}.json")
+
+
+def has_shard(key):
+    return all(os.path.exists(path) for path in _shard_paths(key))
+
+
+def _load_shard(key):
+    if not has_shard(key):
+        return None
+    vectors_path, chunks_path = _shard_paths(key)
+    with open(chunks_path, "r", encoding="utf-8") as file:
+        shard = json.load(file)
+    return np.load(vectors_path, mmap_mode="r"), shard["chunks"], shard["parents"]
+
+
+def _build_shard(path, key, embeddings):
+    pieces, sections = _chunk_pdf(path)
+    vectors = _normalize(np.asarray(embeddings.embed_documents([piece["text"] for piece in pieces]), dtype=np.float32))
+    parents = [{"id": f"{key[:12]}-p{i}", **section} for i, section in enumerate(sections)]
+    chunks = []
+    for i, piece in enumerate(pieces):
+        metadata = dict(piece["metadata"])
+        if "parent" in metadata:
+            metadata["parent"] = parents[metadata["parent"]]["id"]
+        chunks.append({"id": f"{key[:12]}-{i}", "text": piece["text"], "metadata": metadata})
+
+    vectors_path, chunks_path = _shard_paths(key)
+    os.makedirs(os.path.dirname(vectors_path), exist_ok=True)
+    _atomic_save(vectors_path, vectors)
+    _atomic_dump(chunks_path, {"chunks": chunks, "parents": parents})
+    return vectors, chunks, parents
+
+
+def _prune_shards(keep_keys):
+    """Delete shards that no longer belong to any indexed document."""
+    shard_dir = os.path.join(INDEX_DIR, "shards")
+    if not os.path.isdir(shard_dir):
+        return []
+    removed = []
+    for name in os.listdir(shard_dir):
+        key = name.split(".", 1)[0]
+        if key not in keep_keys:
+            os.remove(os.path.join(shard_dir, name))
+            removed.append(name)
+    return removed
+
+
+def _atomic_save(path, array):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as file:
+        np.save(file, np.ascontiguousarray(array, dtype=np.float32))
+    os.replace(tmp_path, path)
+
+
+def _atomic_dump(path, payload):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(payload, file)
+    os.replace(tmp_path, path)
+
+
+def read_manifest():
+    try:
+        with open(os.path.join(INDEX_DIR, MANIFEST_FILE), "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def build_index(pdf_files, embeddings, keys=None):
+    """Embed any PDF without a stored shard, then write the combined index files."""
+    keys = keys or {os.path.basename(path): document_key(path) for path in pdf_files}
+
+    all_vectors, all_chunks, all_parents = [], [], []
+    for path in pdf_files:
+        key = keys[os.path.basename(path)]
+        shard = _load_shard(key) or _build_shard(path, key, embeddings)
+        all_vectors.append(np.asarray(shard[0]))
+        all_chunks.extend(shard[1])
+        all_parents.extend(shard[2])
+
+    os.makedirs(INDEX_DIR, exist_ok=True)
+    dim = all_vectors[0].shape[1] if all_vectors else 0
+    vectors = np.vstack(all_vectors) if all_vectors else np.zeros((0, dim), dtype=np.float32)
+    _atomic_save(os.path.join(INDEX_DIR, EMBEDDINGS_FILE), vectors)
+    _atomic_dump(os.path.join(INDEX_DIR, CHUNKS_FILE), all_chunks)
+    _atomic_dump(os.path.join(INDEX_DIR, PARENTS_FILE), all_parents)
+    if len(vectors):
+        _atomic_save(os.path.join(INDEX_DIR, CENTROIDS_FILE), kmeans(vectors, TOPIC_CLUSTERS)[0])
+    BM25Index.build([chunk["text"] for chunk in all_chunks]).save(INDEX_DIR)
+    build_ann(vectors, INDEX_DIR)
+    # Manifest goes last so a half-written index is never treated as valid
+    _atomic_dump(os.path.join(INDEX_DIR, MANIFEST_FILE), {"settings": settings_fingerprint(), "documents": keys})
+    _prune_shards(set(keys.values()))
+    return keys
+
+
+def load_index(pdf_files, embeddings):
+    """Map the stored index, rebuilding first only if a document or setting changed."""
+    keys = {os.path.basename(path): document_key(path) for path in pdf_files}
+    manifest = read_manifest()
+    centroids_path = os.path.join(INDEX_DIR, CENTROIDS_FILE)
+    derived_missing = any(not os.path.exists(os.path.join(INDEX_DIR, name)) for name in DERIVED_FILES)
+    if manifest is None or manifest.get("documents") != keys or derived_missing:
+        build_index(pdf_files, embeddings, keys)
+
+    vectors = np.load(os.path.join(INDEX_DIR, EMBEDDINGS_FILE), mmap_mode="r")
+    centroids = np.load(centroids_path) if os.path.exists(centroids_path) else None
+    with open(os.path.join(INDEX_DIR, CHUNKS_FILE), "r", encoding="utf-8") as file:
+        chunks = json.load(file)
+    with open(os.path.join(INDEX_DIR, PARENTS_FILE), "r", encoding="utf-8") as file:
+        parents = {parent["id"]: parent for parent in json.load(file)}
+
+    return NumpyVectorStore(
+        embeddings,
+        vectors=vectors,
+        texts=[chunk["text"] for chunk in chunks],
+        metadatas=[chunk["metadata"] for chunk in chunks],
+        ids=[chunk["id"] for chunk in chunks],
+        centroids=centroids,
+        bm25=BM25Index.load(INDEX_DIR),
+        ann=load_ann(vectors, INDEX_DIR),
+        parents=parents,
+    )
@@ -0,0 +1,47 @@
+import os
+import time
+
+from index_store import DOCS_DIR, build_index, document_key, get_embeddings, has_shard, read_manifest, scan_documents
+
+
+def diff_documents(pdf_files):
+    """Compare the PDFs on disk with the manifest of the last indexed build."""
+    manifest = read_manifest() or {}
+    indexed = manifest.get("documents", {})
+    current = {os.path.basename(path): document_key(path) for path in pdf_files}
+
+    return {
+        "added": sorted(name for name in current if name not in indexed),
+        "modified": sorted(name for name in current if name in indexed and indexed[name] != current[name]),
+        "removed": sorted(name for name in indexed if name not in current),
+        "unchanged": sorted(name for name in current if indexed.get(name) == current[name]),
+        "keys": current,
+    }
+
+
+def sync_index(docs_dir=DOCS_DIR, dry_run=False, embeddings=None, **engine_options):
+    """Bring the stored index in line with docs/, embedding only new or modified PDFs."""
+    start = time.perf_counter()
+    pdf_files = scan_documents(docs_dir)
+    changes = diff_documents(pdf_files)
+    changed = changes["added"] + changes["modified"]
+    owns_embeddings = False
+
+    if not dry_run and (changed or changes["removed"] or read_manifest() is None):
+        # The embedding model is only loaded when something actually needs embedding; a
+        # removal-only sync still has to embed any shard that went missing from disk
+        needs_embedding = changed or not all(has_shard(key) for key in changes["keys"].values())
+        if needs_embedding and embeddings is None:
+            embeddings = get_embeddings(**engine_options)
+            owns_embeddings = True
+        build_index(pdf_files, embeddings, changes["keys"])
+
+    if changed and hasattr(embeddings, "describe"):
+        changes["embedding"] = embeddings.describe()
+    if owns_embeddings:
+        embeddings.close()
+
+    changes.pop("keys")
+    changes["seconds"] = round(time.perf_counter() - start, 3)
+    changes["dry_run"] = dry_run
+    return changes
@@ -0,0 +1,144 @@
+import io
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# ✅ Extraction Settings
+# pytesseract runs every OCR call in its own tesseract process, so a thread pool
+# is enough to spread scanned pages across CPU cores.
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "0")) or os.cpu_count() or 1
+OCR_DPI = 200
+MIN_TEXT_CHARS = 20  # a page with less embedded text than this is treated as scanned
+
+CSV_CHUNK_ROWS = 5000
+CSV_PREVIEW_ROWS = 20
+TXT_SECTION_CHARS = 8000
+
+
+def _ocr_png(png_bytes):
+    import pytesseract
+    from PIL import Image
+
+    return pytesseract.image_to_string(Image.open(io.BytesIO(png_bytes)))
+
+
+def iter_pdf_pages(data, ocr_workers=OCR_WORKERS):
+    """Yield ``("Page n", text)`` in page order, OCR-ing scanned pages in parallel.
+
+    Text pages are yielded as soon as every page before them is ready, so the
+    caller can start on page 1 while later scanned pages are still in OCR.
+    """
+    import fitz
+
+    doc = fitz.open(stream=data, filetype="pdf")
+    pending = deque()  # (label, text or Future) in page order
+
+    with ThreadPoolExecutor(max_workers=ocr_workers, thread_name_prefix="ocr") as pool:
+        for number, page in enumerate(doc, start=1):
+            text = page.get_text("text")
+            if len(text.strip()) < MIN_TEXT_CHARS:
+                png = page.get_pixmap(dpi=OCR_DPI).tobytes("png")
+                text = pool.submit(_ocr_png, png)
+            pending.append((f"Page {number}", text))
+
+            while pending and (isinstance(pending[0][1], str) or pending[0][1].done()):
+                yield _resolve(pending.popleft())
+
+        while pending:
+            yield _resolve(pending.popleft())
+    doc.close()
+
+
+def _resolve(item):
+    label, text = item
+    if isinstance(text, str):
+        return label, text
+    try:
+        return label, text.result()
+    except Exception as e:
+        # One unreadable scan should not lose the rest of the report
+        print(f"❌ OCR failed for {label}: {e}")
+        return label, ""
+
+
+def iter_csv_sections(file, chunk_rows=CSV_CHUNK_ROWS, preview_rows=CSV_PREVIEW_ROWS):
+    """Yield a preview of the first rows, then one summary of every column over the whole file.
+
+    The CSV is read ``chunk_rows`` at a time, so a large export is never held
+    (or rendered) in full.
+    """
+    import pandas as pd
+
+    rows = 0
+    columns = None
+    numeric = {}  # column -> [count, sum, min, max]
+    categorical = {}  # column -> {value: count}, capped
+
+    for chunk in pd.read_csv(file, chunksize=chunk_rows):
+        if columns is None:
+            columns = list(chunk.columns)
+            yield "Preview", f"Columns: {', '.join(map(str, columns))}\n\n{chunk.head(preview_rows).to_string()}"
+        rows += len(chunk)
+
+        for column in chunk.columns:
+            series = chunk[column]
+            if pd.api.types.is_numeric_dtype(series):
+                values = series.dropna()
+                stats = numeric.setdefault(column, [0, 0.0, float("inf"), float("-inf")])
+                if len(values):
+                    stats[0] += len(values)
+                    stats[1] += float(values.sum())
+                    stats[2] = min(stats[2], float(values.min()))
+                    stats[3] = max(stats[3], float(values.max()))
+            else:
+                counts = categorical.setdefault(column, {})
+                for value, count in series.value_counts().head(50).items():
+                    counts[value] = counts.get(value, 0) + int(count)
+
+    if columns is None:
+        return
+
+    lines = [f"Rows: {rows}, Columns: {len(columns)}"]
+    for column, (count, total, low, high) in numeric.items():
+        if count:
+            lines.append(f"{column}: n={count}, mean={total / count:.4g}, min={low:.4g}, max={high:.4g}")
+    for column, counts in categorical.items():
+        top = sorted(counts.items(), key=lambda item: item[1], reverse=True)[:5]
+        lines.append(f"{column}: " + ", ".join(f"{value} ({count})" for value, count in top))
+    yield "Summary", "\n".join(lines)
+
+
+def iter_text_sections(file, section_chars=TXT_SECTION_CHARS):
+    """Yield a plain-text upload in line-aligned sections of about ``section_chars``."""
+    buffer, size, number = [], 0, 1
+    for raw_line in io.TextIOWrapper(file, encoding="utf-8", errors="replace"):
+        buffer.append(raw_line)
+        size += len(raw_line)
+        if size >= section_chars:
+            yield f"Part {number}", "".join(buffer)
+            buffer, size, number = [], 0, number + 1
+    if buffer:
+        yield f"Part {number}", "".join(buffer)
+
+
+def iter_uploaded_file(uploaded_file):
+    """Yield ``(label, text)`` sections of an uploaded lab report as they are extracted."""
+    file_extension = uploaded_file.name.split(".")[-1].lower()
+
+    if file_extension == "pdf":
+        yield from iter_pdf_pages(uploaded_file.read())
+
+    elif file_extension == "csv":
+        yield from iter_csv_sections(uploaded_file)
+
+    elif file_extension == "txt":
+        yield from iter_text_sections(uploaded_file)
+
+    elif file_extension in ["jpg", "jpeg", "png"]:
+        yield "Image", _ocr_png(uploaded_file.read())
+
+
+# Function for multimodal file analysis
+def process_uploaded_file(uploaded_file):
+    """Whole extracted text of an upload; see iter_uploaded_file to stream it."""
+    return "\n".join(text for _, text in iter_uploaded_file(uploaded_file))
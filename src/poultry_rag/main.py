@@ -1,23 +1,29 @@
 import os
+import time
 import streamlit as st
-from dotenv import load_dotenv
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.indexes import VectorstoreIndexCreator
-from utils import get_weather
-from langchain.embeddings import HuggingFaceEmbeddings
-import requests
-from langchain.chains import RetrievalQA
-from langchain_groq import ChatGroq
-from langchain_community.document_loaders import PyPDFLoader
-import google.generativeai as genai
+from config import get_secret
+from gemini import generate_content
+from web_services import get_weather
+from answer_cache import SemanticAnswerCache
+from orchestrator import DEFAULT_FALLBACKS, as_completed, submit_lookups
+from relevance import RelevanceGate, normalize_query
+from memory import MAX_RENDERED_MESSAGES, ConversationMemory
+import http_client
+import tracing
+from offline import OFFLINE, StubChatModel
+
+# LangChain, the embedding model and the Groq client are imported on first use
+# (the first question), so the page itself renders without loading them.
 
 # ✅ Load Environment Variables
-load_dotenv()
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY") or st.secrets.get("GOOGLE_API_KEY")
-YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY") or st.secrets.get("YOUTUBE_API_KEY")
-GOOGLE_CSE_ID = os.getenv("GOOGLE_CSE_ID") or st.secrets.get("GOOGLE_CSE_ID")
-GOOGLE_SEARCH_API = os.getenv("GOOGLE_SEARCH_API") or st.secrets.get("GOOGLE_SEARCH_API")
-GROQ_API_KEY = os.getenv("GROQ_API_KEY") or st.secrets.get("GROQ_API_KEY")
+YOUTUBE_API_KEY = get_secret("YOUTUBE_API_KEY")
+GOOGLE_CSE_ID = get_secret("GOOGLE_CSE_ID")
+GOOGLE_SEARCH_API = get_secret("GOOGLE_SEARCH_API")
+GROQ_API_KEY = get_secret("GROQ_API_KEY")
+DEBUG_PANEL = os.getenv("DEBUG_PANEL") == "1"  # or open the app with ?debug=1
+
+# ✅ Prometheus-style /metrics endpoint (only when METRICS_PORT is set)
+tracing.start_metrics_server()
 
 # ✅ Streamlit UI
 st.title("🐔 EGGSPERT AI ASSISTANT")
@@ -39,64 +45,69 @@ if temp is not None:
 else:
     st.error("⚠️ Unable to fetch weather data. Please check your internet or API key.")
 
-# ✅ Sidebar Navigation
-
-with st.sidebar:
-    
-    st.header("🐔 Quick Access")
-
-    with st.expander("🧪 Laboratory"):
-        st.page_link("pages/lab_analysis.py", label="Lab Report Analysis")
+# ✅ Full answer as stored in the transcript and the answer cache. Kept flush-left:
+# indented lines after a blank line would render as a Markdown code block.
+RESPONSE_TEMPLATE = """
+### 📖 Knowledge Base Response:
+{kb}
 
-    with st.expander("📊 Financial Tools"):
-        st.page_link("pages/profit_calculator.py", label="Profit Calculator")
+---
 
-    with st.expander("🩺 Disease & Treatment"):
-        st.page_link("pages/disease_diagnose.py", label="Disease Diagnosis")
+### 🌍 Web Search Results:
+{web}
 
-    with st.expander("🥚 Market Updates"):
-        st.page_link("pages/egg_prices.py", label="Latest Egg Rates")
+---
 
+### 🎥 Video Results:
+{videos}
+"""
 
 # ✅ Initialize session state
 if "messages" not in st.session_state:
     st.session_state.messages = []
-if "chat_history" not in st.session_state:
-    st.session_state.chat_history = []
+if "memory" not in st.session_state:
+    st.session_state.memory = ConversationMemory()
+if "hidden_messages" not in st.session_state:
+    st.session_state.hidden_messages = 0
 if "feedback" not in st.session_state:
     st.session_state.feedback = []
+if "ttft" not in st.session_state:
+    st.session_state.ttft = []
 
 # ✅ Initialize the Groq Chat Model
-groq_chat = ChatGroq(
-    groq_api_key=GROQ_API_KEY,
-    model_name="llama3-8b-8192"
-)
+@st.cache_resource
+def get_groq_chat():
+    if OFFLINE:
+        return StubChatModel()
+
+    from langchain_groq import ChatGroq
+
+    return ChatGroq(
+        groq_api_key=GROQ_API_KEY,
+        model_name="llama3-8b-8192"
+    )
 
 # ✅ Load Vector Store (PDF Knowledge Base)
 @st.cache_resource
 def get_vectorstore():
-    BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # ✔️ Fix path issue
-    pdf_files = [
-        os.path.join(BASE_DIR, "docs", "poultry1.pdf"),
-        os.path.join(BASE_DIR, "docs", "poultry2.pdf"),
-        os.path.join(BASE_DIR, "docs", "poultry3.pdf"),
-    ]
+    from index_store import get_embeddings, load_index, scan_documents
 
+    BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # ✔️ Fix path issue
+    docs_dir = os.path.join(BASE_DIR, "docs")
+    pdf_files = scan_documents(docs_dir)
 
     # ✅ Debug Missing PDFs
-    for pdf in pdf_files:
-        if not os.path.exists(pdf):
-            st.error(f"File not found: {pdf}")
-            raise FileNotFoundError(f"File not found: {pdf}")
-
-    loaders = [PyPDFLoader(pdf) for pdf in pdf_files]
+    if not pdf_files:
+        st.error(f"No PDF documents found in: {docs_dir}")
+        raise FileNotFoundError(f"No PDF documents found in: {docs_dir}")
 
-    index = VectorstoreIndexCreator(
-        embedding=HuggingFaceEmbeddings(model_name='sentence-transformers/all-MiniLM-L12-v2'),
-        text_splitter=RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
-    ).from_loaders(loaders)
+    # ✅ Reuse the on-disk index; PDFs are only re-parsed and re-embedded when they change
+    return load_index(pdf_files, get_embeddings())
 
-    return index.vectorstore
+# ✅ Semantic Answer Cache (shared by all sessions, persisted across restarts)
+@st.cache_resource
+def get_answer_cache():
+    return SemanticAnswerCache()
 
 # ✅ AI-Based Query Check (Relevance Detection)
 def is_relevant_query_ai(query):
@@ -110,63 +121,143 @@ def is_relevant_query_ai(query):
     User Query: "{query}"
     """
     
-    model = genai.GenerativeModel("gemini-2.0-flash")
-    response = model.generate_content([prompt]).text.strip()
+    response = generate_content("gemini-2.0-flash", [prompt]).text.strip()
     return response == "YES"
 
-# ✅ Web Search Function
+# ✅ Local Relevance Gate (escalates to Gemini only for ambiguous queries)
+@st.cache_resource
+def get_relevance_gate():
+    return RelevanceGate(get_vectorstore().centroids, is_relevant_query_ai)
+
+# ✅ Web Search Function (a failed request raises, so the lookup marks the turn as degraded
+# and the answer is not cached with an error in place of the results)
 def web_search(query, num_results=5):
     if not GOOGLE_SEARCH_API or not GOOGLE_CSE_ID:
         return "❌ No web search results available."
 
-    try:
-        url = "https://www.googleapis.com/customsearch/v1"
-        params = {"q": query, "key": GOOGLE_SEARCH_API, "cx": GOOGLE_CSE_ID, "num": num_results}
-        response = requests.get(url, params=params)
-        response.raise_for_status()
+    url = "https://www.googleapis.com/customsearch/v1"
+    params = {"q": query, "key": GOOGLE_SEARCH_API, "cx": GOOGLE_CSE_ID, "num": num_results}
+    response = http_client.get(
+        url, params=params, ttl=http_client.SEARCH_TTL,
+        cache_key=("web", normalize_query(query), num_results)
+    )
 
-        data = response.json()
-        results = data.get("items", [])
+    data = response.json()
+    results = data.get("items", [])
 
-        if not results:
-            return "❌ No relevant web search results found."
+    if not results:
+        return "❌ No relevant web search results found."
 
-        formatted_results = "\n\n".join([
-            f"🔗 **[{item.get('title', 'No Title')}]({item.get('link', '#')})**\n{item.get('snippet', 'No description available.')}"
-            for item in results
-        ])
+    formatted_results = "\n\n".join([
+        f"🔗 **[{item.get('title', 'No Title')}]({item.get('link', '#')})**\n{item.get('snippet', 'No description available.')}"
+        for item in results
+    ])
 
-        return formatted_results
+    return formatted_results
 
-    except requests.exceptions.RequestException as e:
-        return f"❌ Web search failed: {e}"
-
-# ✅ YouTube Search Function
+# ✅ YouTube Search Function (raises on failure, like web_search)
 def search_youtube_videos(query, num_results=5):
     if not YOUTUBE_API_KEY:
         return "❌ No video results available."
 
-    try:
-        url = f"https://www.googleapis.com/youtube/v3/search?part=snippet&q={query}&type=video&maxResults={num_results}&key={YOUTUBE_API_KEY}"
-        response = requests.get(url)
-        data = response.json()
+    url = "https://www.googleapis.com/youtube/v3/search"
+    params = {"part": "snippet", "q": query, "type": "video", "maxResults": num_results, "key": YOUTUBE_API_KEY}
+    response = http_client.get(
+        url, params=params, ttl=http_client.SEARCH_TTL,
+        cache_key=("youtube", normalize_query(query), num_results)
+    )
+    data = response.json()
+
+    videos = data.get("items", [])
+
+    if not videos:
+        return "❌ No relevant YouTube videos found."
+
+    formatted_videos = "\n\n".join([
+        f"🎥 **[{vid['snippet']['title']}](https://www.youtube.com/watch?v={vid['id']['videoId']})**\n📺 {vid['snippet']['channelTitle']}"
+        for vid in videos
+    ])
+
+    return formatted_videos
+
+# ✅ Transcript shown on screen: only the latest MAX_RENDERED_MESSAGES are kept and re-rendered
+def remember_message(role, content):
+    st.session_state.messages.append({"role": role, "content": content})
+    overflow = len(st.session_state.messages) - MAX_RENDERED_MESSAGES
+    if overflow > 0:
+        del st.session_state.messages[:overflow]
+        st.session_state.hidden_messages += overflow
+
+# ✅ Run one stage of a chat turn in its own tracing span
+def run_stage(name, func, *args):
+    with tracing.span(name) as stage:
+        result = func(*args)
+        if isinstance(result, bool) or result is None:
+            stage.set(result=result)
+        else:
+            stage.set(result_chars=len(str(result)))
+        return result
 
-        videos = data.get("items", [])
+# ✅ Sidebar Navigation
 
-        if not videos:
-            return "❌ No relevant YouTube videos found."
+with st.sidebar:
+    
+    st.header("🐔 Quick Access")
 
-        formatted_videos = "\n\n".join([
-            f"🎥 **[{vid['snippet']['title']}](https://www.youtube.com/watch?v={vid['id']['videoId']})**\n📺 {vid['snippet']['channelTitle']}"
-            for vid in videos
-        ])
+    with st.expander("🧪 Laboratory"):
+        st.page_link("pages/lab_analysis.py", label="Lab Report Analysis")
 
-        return formatted_videos
+    with st.expander("📊 Financial Tools"):
+        st.page_link("pages/profit_calculator.py", label="Profit Calculator")
 
-    except Exception as e:
-        return f"❌ YouTube search failed: {str(e)}"
+    with st.expander("🩺 Disease & Treatment"):
+        st.page_link("pages/disease_diagnose.py", label="Disease Diagnosis")
 
-# ✅ Show previous messages
+    with st.expander("🥚 Market Updates"):
+        st.page_link("pages/egg_prices.py", label="Latest Egg Rates")
+
+    cache_stats = get_answer_cache().stats()
+    st.caption(
+        f"⚡ Answer cache: {cache_stats['entries']} entries, "
+        f"{cache_stats['hits']} hits / {cache_stats['misses']} misses"
+    )
+    memory = st.session_state.memory
+    if memory:
+        st.caption(
+            f"🧠 Memory: {len(memory.turns)} recent turns + summary of {memory.summarized_turns} earlier, "
+            f"~{memory.tokens()} tokens"
+        )
+    if st.session_state.ttft:
+        ttfts = sorted(st.session_state.ttft)
+        st.caption(f"⏱️ Median time to first token: {ttfts[len(ttfts) // 2]:.2f}s over {len(ttfts)} answers")
+
+    # ✅ Per-stage latency of this server process (see also /metrics and cache/traces.jsonl)
+    if DEBUG_PANEL or st.query_params.get("debug") == "1":
+        with st.expander("🔬 Latency Debug", expanded=True):
+            summary = tracing.recorder.summary()
+            if summary:
+                st.dataframe(
+                    [{"stage": name, **row} for name, row in summary.items()],
+                    hide_index=True,
+                    use_container_width=True,
+                )
+            if tracing.recorder.counters:
+                st.caption(" · ".join(f"{name}: {value:g}" for name, value in sorted(tracing.recorder.counters.items())))
+
+            last_turn = tracing.recorder.last_trace("chat.turn")
+            if last_turn:
+                st.markdown("**Last turn**")
+                depth = {}
+                for span in last_turn:
+                    depth[span["span_id"]] = depth.get(span["parent_id"], -1) + 1
+                    flag = " ❌" if span["status"] == "error" else ""
+                    st.text(f"{'  ' * depth[span['span_id']]}{span['name']}: {span['duration_ms']:.0f} ms{flag}")
+
+
+# ✅ Show previous messages (older ones are folded into the conversation summary)
+if st.session_state.hidden_messages:
+    with st.expander(f"🗂️ {st.session_state.hidden_messages} earlier messages"):
+        st.markdown(st.session_state.memory.summary or "Summarized in the assistant's memory.")
 for msg in st.session_state.messages:
     st.chat_message(msg["role"]).markdown(msg["content"])
 
@@ -174,46 +265,118 @@ for msg in st.session_state.messages:
 prompt = st.chat_input("Ask me anything about Poultry Farming!")
 
 if prompt:
-    st.chat_message("user").markdown(prompt)
-    st.session_state.messages.append({"role": "user", "content": prompt})
-
-    try:
-        if not is_relevant_query_ai(prompt):
-            st.chat_message("assistant").markdown("❌ This chatbot is specialized for poultry-related topics.")
-            st.stop()
-
-        vectorstore = get_vectorstore()
-        if vectorstore is None:
-            st.error("Failed to load the document")
-            st.stop()
-
-        chain = RetrievalQA.from_chain_type(
-            llm=groq_chat,
-            chain_type='stuff',
-            retriever=vectorstore.as_retriever(search_kwargs={"k": 3}),
-            return_source_documents=True
-        )
-        kb_response = chain({"query": prompt, "chat_history": st.session_state.chat_history}).get("result", "❌ No knowledge base results.")
-
-        web_response = web_search(prompt)
-        videos_response = search_youtube_videos(prompt)
-
-        final_response = f"""
-### 📖 Knowledge Base Response:
-{kb_response}
-
----
-
-### 🌍 Web Search Results:
-{web_response}
-
----
-
-### 🎥 Video Results:
-{videos_response}
-"""
-        st.chat_message("assistant").markdown(final_response, unsafe_allow_html=True)
-
-    except Exception as e:
-        st.error(f"Error: [{str(e)}]")  
+    with tracing.span("chat.turn") as turn:
+        turn_started = time.perf_counter()
+        st.chat_message("user").markdown(prompt)
+        remember_message("user", prompt)
+        memory = st.session_state.memory
+
+        try:
+            vectorstore = run_stage("load_vectorstore", get_vectorstore)
+            if vectorstore is None:
+                st.error("Failed to load the document")
+                st.stop()
+
+            # ✅ Follow-ups ("how is it treated?") become standalone questions before retrieval
+            query = memory.standalone_question(prompt, get_groq_chat())
+            turn.set(rewritten=query != prompt)
+
+            # ✅ Near-identical questions are answered straight from the cache
+            answer_cache = get_answer_cache()
+            with tracing.span("embed_query"):
+                query_vector = vectorstore.embeddings.embed_query(query)
+            with tracing.span("answer_cache.lookup") as stage:
+                cached = answer_cache.lookup(query_vector)
+                stage.set(hit=cached is not None)
+            tracing.count("answer_cache.hit" if cached is not None else "answer_cache.miss")
+            if cached is not None:
+                turn.set(outcome="cached")
+                st.chat_message("assistant").markdown(cached["answer"], unsafe_allow_html=True)
+                remember_message("assistant", cached["answer"])
+                # Like a fresh answer, only the knowledge-base part goes into memory, not the links
+                memory.add_turn(query, cached["kb_answer"], get_groq_chat())
+                st.stop()
+
+            # ✅ The local relevance gate answers in milliseconds; paid web/video searches only
+            # start before its verdict when the query has to be escalated to Gemini
+            relevance_gate = get_relevance_gate()
+            searches = {
+                "web": lambda: run_stage("web", web_search, query),
+                "videos": lambda: run_stage("videos", search_youtube_videos, query),
+            }
+            relevant = run_stage("relevance", relevance_gate.local_decision, query, query_vector)
+            if relevant is None:
+                lookups = submit_lookups({
+                    "relevance": lambda: run_stage("relevance.llm", relevance_gate.is_relevant, query, query_vector),
+                    **searches,
+                })
+                # An unreachable relevance check should not block a farmer's question
+                relevant = lookups.pop("relevance").result(fallback=True)
+            else:
+                lookups = submit_lookups(searches) if relevant else {}
+
+            if not relevant:
+                turn.set(outcome="off_topic")
+                off_topic = "❌ This chatbot is specialized for poultry-related topics."
+                st.chat_message("assistant").markdown(off_topic)
+                remember_message("assistant", off_topic)
+                st.stop()
+
+            from rag_chain import StreamedAnswer, retrieve
+
+            docs = retrieve(vectorstore, query, query_vector, k=3)
+
+            # ✅ Stream the knowledge-base answer, then add web/video sections as they finish
+            sections = {
+                "web": "### 🌍 Web Search Results:",
+                "videos": "### 🎥 Video Results:",
+            }
+            results = {}
+            with st.chat_message("assistant"):
+                st.markdown("### 📖 Knowledge Base Response:")
+                kb_area = st.container()
+                placeholders = {name: st.empty() for name in sections}
+
+                def show_section(name, result):
+                    results[name] = result
+                    placeholders[name].markdown(f"---\n\n{sections[name]}\n{result}", unsafe_allow_html=True)
+
+                def stream_with_lookups(tokens):
+                    # Fill in web/video sections between tokens as soon as they are ready
+                    for token in tokens:
+                        yield token
+                        for name, lookup in list(lookups.items()):
+                            if name not in results and lookup.future.done():
+                                show_section(name, lookup.result(DEFAULT_FALLBACKS.get(name)))
+
+                answer = StreamedAnswer(get_groq_chat(), query, docs, started=turn_started, history=memory.messages())
+                kb_area.write_stream(stream_with_lookups(answer))
+                if answer.ttft is not None:
+                    st.session_state.ttft.append(answer.ttft)
+                    kb_area.caption(f"⏱️ First token after {answer.ttft:.2f}s, full answer after {answer.total:.2f}s")
+
+                remaining = {name: lookup for name, lookup in lookups.items() if name not in results}
+                for name, result in as_completed(remaining):
+                    show_section(name, result)
+
+            kb_response = answer.text
+            web_response = results["web"]
+            videos_response = results["videos"]
+
+            final_response = RESPONSE_TEMPLATE.format(kb=kb_response, web=web_response, videos=videos_response)
+            # Degraded answers (a source timed out or failed) are not worth replaying
+            degraded = not answer.ok or not all(lookup.ok for lookup in lookups.values())
+            if not degraded:
+                answer_cache.store(query_vector, query, final_response, kb_response)
+            remember_message("assistant", final_response)
+            # Only the knowledge-base answer is remembered; older turns are summarized once over budget
+            if answer.ok:
+                memory.add_turn(query, kb_response, get_groq_chat())
+            turn.set(outcome="degraded" if degraded else "answered", response_chars=len(final_response),
+                     ttft_ms=round(answer.ttft * 1000, 1) if answer.ttft is not None else None)
+
+        except Exception as e:
+            # Still shown to the user, but now also recorded on the turn's trace
+            turn.fail(e)
+            st.error(f"Error: [{str(e)}]")  
 
@@ -0,0 +1,145 @@
+import os
+import re
+
+from tracing import count, span
+
+# LangChain is imported on first use, like in main.py
+
+# ✅ Memory Settings (tokens are estimated as characters / 4, no tokenizer needed)
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "800"))  # recent turns kept word for word
+SUMMARY_TOKEN_BUDGET = int(os.getenv("SUMMARY_TOKEN_BUDGET", "250"))  # rolling summary of everything older
+ANSWER_TOKENS_PER_TURN = 300  # long answers are clipped before they enter memory
+REWRITE_CONTEXT_TURNS = 2  # recent turns shown to the query rewriter
+MAX_RENDERED_MESSAGES = int(os.getenv("MAX_RENDERED_MESSAGES", "20"))
+CHARS_PER_TOKEN = 4
+
+# A question with one of these (or only a few words) probably leans on earlier turns
+FOLLOW_UP_WORDS = {
+    "it", "its", "they", "them", "their", "this", "that", "these", "those", "there", "he", "she",
+    "same", "also", "above", "previous", "earlier", "again", "else", "instead", "another", "other",
+}
+FOLLOW_UP_MAX_WORDS = 4
+
+SUMMARY_INSTRUCTIONS = (
+    "You maintain a running summary of a conversation between a poultry farmer and an assistant. "
+    "Merge the new turns into the existing summary. Keep diseases, birds, ages, flock sizes, symptoms, "
+    "treatments and open questions; drop pleasantries. Reply with the summary only, under {words} words."
+)
+REWRITE_INSTRUCTIONS = (
+    "Rewrite the farmer's latest question so it can be understood without the conversation below, "
+    "replacing words like 'it' or 'they' with what they refer to. If it already stands alone, return it "
+    "unchanged. Reply with the question only.\n\nConversation:\n{history}"
+)
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def clip(text, tokens, keep="start"):
+    """Cut ``text`` to about ``tokens`` tokens, keeping its start or its end."""
+    limit = tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    return text[:limit].rstrip() + " …" if keep == "start" else "… " + text[-limit:].lstrip()
+
+
+def _ask(llm, instructions, text):
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    return llm.invoke([SystemMessage(content=instructions), HumanMessage(content=text)]).content.strip()
+
+
+def format_turns(turns):
+    return "\n".join(f"Farmer: {question}\nAssistant: {answer}" for question, answer in turns)
+
+
+class ConversationMemory:
+    """Chat history with a constant prompt cost.
+
+    The latest turns are kept word for word up to ``history_tokens``; older turns
+    are folded into a rolling summary of at most ``summary_tokens`` by ``llm``
+    (any LangChain chat model), or clipped when it is unavailable.
+    """
+
+    def __init__(self, history_tokens=HISTORY_TOKEN_BUDGET, summary_tokens=SUMMARY_TOKEN_BUDGET):
+        self.history_tokens = history_tokens
+        self.summary_tokens = summary_tokens
+        self.turns = []  # [(question, answer)], oldest first
+        self.summary = ""
+        self.summarized_turns = 0
+
+    def __bool__(self):
+        return bool(self.turns or self.summary)
+
+    def recent_tokens(self):
+        return sum(estimate_tokens(question) + estimate_tokens(answer) for question, answer in self.turns)
+
+    def tokens(self):
+        return estimate_tokens(self.summary) + self.recent_tokens()
+
+    def add_turn(self, question, answer, llm=None):
+        self.turns.append((question, clip(answer, ANSWER_TOKENS_PER_TURN)))
+        overflow = []
+        while len(self.turns) > 1 and self.recent_tokens() > self.history_tokens:
+            overflow.append(self.turns.pop(0))
+        if overflow:
+            self._fold(overflow, llm)
+
+    def _fold(self, turns, llm):
+        transcript = format_turns(turns)
+        with span("memory.summarize", turns=len(turns)) as stage:
+            summary = None
+            if llm is not None:
+                try:
+                    summary = _ask(
+                        llm,
+                        SUMMARY_INSTRUCTIONS.format(words=int(self.summary_tokens * 0.75)),
+                        f"Existing summary:\n{self.summary or '(none)'}\n\nNew turns:\n{transcript}",
+                    )
+                except Exception as e:
+                    print(f"⚠️ Conversation summary failed: {e}")
+                    count("memory.summary_error")
+            # Without a model the oldest details are the first to go
+            self.summary = (clip(summary, self.summary_tokens) if summary
+                            else clip(f"{self.summary}\n{transcript}".strip(), self.summary_tokens, keep="end"))
+            self.summarized_turns += len(turns)
+            stage.set(summary_tokens=estimate_tokens(self.summary), llm=bool(summary))
+
+    def messages(self):
+        """History for the answer prompt: the summary, then the recent turns as chat messages."""
+        from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+        history = []
+        if self.summary:
+            history.append(SystemMessage(content=f"Summary of the earlier conversation:\n{self.summary}"))
+        for question, answer in self.turns:
+            history.extend([HumanMessage(content=question), AIMessage(content=answer)])
+        return history
+
+    def is_follow_up(self, question):
+        words = re.findall(r"[a-z']+", question.lower())
+        return len(words) <= FOLLOW_UP_MAX_WORDS or bool(FOLLOW_UP_WORDS.intersection(words))
+
+    def standalone_question(self, question, llm):
+        """``question`` rewritten to stand on its own, so retrieval and search see what it is about.
+
+        Questions that do not look like follow-ups skip the extra LLM call.
+        """
+        if not self or not self.is_follow_up(question):
+            count("memory.rewrite_skipped")
+            return question
+        history = "\n".join(filter(None, [self.summary, format_turns(self.turns[-REWRITE_CONTEXT_TURNS:])]))
+        with span("memory.rewrite") as stage:
+            try:
+                rewritten = _ask(llm, REWRITE_INSTRUCTIONS.format(history=history), question)
+            except Exception as e:
+                print(f"⚠️ Question rewrite failed: {e}")
+                count("memory.rewrite_error")
+                return question
+            rewritten = rewritten.strip('"').strip()
+            # A rambling reply is not a question; fall back to what the farmer typed
+            if not rewritten or estimate_tokens(rewritten) > estimate_tokens(question) * 3 + 30:
+                return question
+            stage.set(changed=rewritten != question)
+            return rewritten
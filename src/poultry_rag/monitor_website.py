@@ -1,81 +1,347 @@
-import requests
-import hashlib
-import time
+"""Watch scraped pages for structural changes that would break our scrapers.
+
+Each target is checked on its own interval with a conditional GET, and only
+the DOM structure of the watched tables is compared (headings, header cells,
+column counts and row labels), so ordinary price updates never alert.
+
+    python monitor_website.py                 # run forever
+    python monitor_website.py --once          # check every target once
+    python monitor_website.py --smtp-debug    # also run a local SMTP stand-in on MONITOR_SMTP_PORT
+
+SMTP settings come from the environment (MONITOR_SMTP_HOST, MONITOR_SMTP_PORT,
+MONITOR_SMTP_USER, MONITOR_SMTP_PASSWORD, MONITOR_ALERT_FROM, MONITOR_ALERT_TO).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
 import smtplib
-from bs4 import BeautifulSoup
+import threading
+import time
+from email import message_from_string
+from email.header import decode_header, make_header
 from email.mime.text import MIMEText
 
-URL = "https://eggrates.pk/"
-PREVIOUS_HASH_FILE = "previous_hash.txt"
+import http_client
 
-# Email Settings
-SMTP_SERVER = "smtp.gmail.com"
-SMTP_PORT = 587
-EMAIL_SENDER = "donia1510aptech@gmail.com"
-EMAIL_PASSWORD = "vhsy iyxs wvbt pcpj"
-EMAIL_RECEIVER = "ummejawwad313@gmail.com"
+# ✅ Monitor Settings
+CACHE_DIR = os.getenv("POULTRY_RAG_CACHE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+STATE_FILE = os.path.join(CACHE_DIR, "monitor_state.json")
+TARGETS_FILE = os.getenv("MONITOR_TARGETS")  # JSON list of {"name", "url", "interval", "selector"}
+MAX_CONCURRENT_CHECKS = int(os.getenv("MONITOR_CONCURRENCY", "20"))
+FAILURES_BEFORE_ALERT = 3  # consecutive failed fetches before an alert is sent
 
-def send_email_alert():
-    subject = "🚨 EggRates Website Structure Changed!"
-    body = "The structure of the website has changed. You need to update your scraper."
+DEFAULT_TARGETS = [
+    {"name": "eggrates.pk", "url": "https://eggrates.pk/", "interval": 24 * 60 * 60, "selector": "table.kb-table"},
+]
 
-    msg = MIMEText(body)
-    msg["Subject"] = subject
-    msg["From"] = EMAIL_SENDER
-    msg["To"] = EMAIL_RECEIVER
+# Email Settings (defaults talk to a local SMTP stand-in without TLS or login)
+SMTP_SERVER = os.getenv("MONITOR_SMTP_HOST", "localhost")
+SMTP_PORT = int(os.getenv("MONITOR_SMTP_PORT", "1025"))
+SMTP_USER = os.getenv("MONITOR_SMTP_USER")
+SMTP_PASSWORD = os.getenv("MONITOR_SMTP_PASSWORD")
+EMAIL_SENDER = os.getenv("MONITOR_ALERT_FROM", "poultry-rag-monitor@localhost")
+EMAIL_RECEIVERS = [address.strip() for address in os.getenv("MONITOR_ALERT_TO", "").split(",") if address.strip()]
 
-    try:
-        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-        server.starttls()
-        server.login(EMAIL_SENDER, EMAIL_PASSWORD)
-        server.sendmail(EMAIL_SENDER, EMAIL_RECEIVER, msg.as_string())
-        server.quit()
-        print("✅ Email alert sent successfully!")
-    except Exception as e:
-        print(f"❌ Failed to send email alert: {e}")
-
-def get_relevant_content():
-    try:
-        response = requests.get(URL)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
 
-        # 🎯 Sirf relevant content extract karein
-        egg_tables = soup.find_all("table", class_="kb-table")  # Target only egg price tables
-        
-        if not egg_tables:
-            print("❌ No relevant content found.")
-            return None
+class Target:
+    """One watched page and the CSS selector of the tables our scraper depends on."""
+
+    def __init__(self, name, url, interval=24 * 60 * 60, selector="table.kb-table"):
+        self.name = name
+        self.url = url
+        self.interval = interval
+        self.selector = selector
 
-        relevant_html = "".join(str(table) for table in egg_tables)  # Convert tables to string
-        return relevant_html.strip()
 
-    except Exception as e:
-        print(f"❌ Failed to fetch website: {e}")
-        return None
+def load_targets(path=TARGETS_FILE):
+    if not path:
+        return [Target(**target) for target in DEFAULT_TARGETS]
+    with open(path, "r", encoding="utf-8") as file:
+        return [Target(**target) for target in json.load(file)]
 
-def check_for_updates():
-    relevant_html = get_relevant_content()
-    if not relevant_html:
-        return  # If fetching failed, don't continue
 
-    new_hash = hashlib.md5(relevant_html.encode('utf-8')).hexdigest()
+def table_structure(html, selector):
+    """Structure of every matching table, keyed by its preceding heading.
+
+    Header cells, the set of column counts and the first-column row labels are
+    kept; cell values (the prices themselves) are not.
+    """
+    from bs4 import BeautifulSoup
 
     try:
-        with open(PREVIOUS_HASH_FILE, "r") as file:
-            previous_hash = file.read().strip()
-    except FileNotFoundError:
-        previous_hash = ""
-
-    if new_hash != previous_hash:
-        print("🚨 Website structure changed! You need to update your scraper.")
-        send_email_alert()  # Send email alert
-        with open(PREVIOUS_HASH_FILE, "w") as file:
-            file.write(new_hash)
-    else:
-        print("✅ No changes detected.")
-
-# Run the check once every 24 hours
-while True:
-    check_for_updates()
-    time.sleep(86400)  # 86400 seconds = 24 hours
+        soup = BeautifulSoup(html, "lxml")
+    except Exception:
+        soup = BeautifulSoup(html, "html.parser")
+
+    structure = {}
+    for table in soup.select(selector):
+        heading = table.find_previous(["h1", "h2", "h3", "h4"])
+        key = heading.get_text(strip=True) if heading else "(no heading)"
+        while key in structure:
+            key += "'"
+        rows = table.find_all("tr")
+        structure[key] = {
+            "headers": [cell.get_text(strip=True) for cell in table.find_all("th")],
+            "columns": sorted({len(row.find_all(["td", "th"])) for row in rows}),
+            "rows": [row.find("td").get_text(strip=True) for row in rows if row.find("td")],
+        }
+    return structure
+
+
+def diff_structure(old, new):
+    """Human-readable list of structural differences between two ``table_structure`` results."""
+    changes = [f"+ table '{key}' added" for key in new if key not in old]
+    changes += [f"- table '{key}' removed" for key in old if key not in new]
+    for key in old.keys() & new.keys():
+        for field in ("headers", "columns", "rows"):
+            if old[key][field] != new[key][field]:
+                changes.append(f"~ table '{key}' {field}: {old[key][field]} → {new[key][field]}")
+    return changes
+
+
+# Alert sinks
+class AlertSink:
+    """Receives alerts; subclass and override ``send`` to add a channel."""
+
+    async def send(self, subject, body):
+        raise NotImplementedError
+
+
+class ConsoleSink(AlertSink):
+    async def send(self, subject, body):
+        print(f"{subject}\n{body}")
+
+
+class SMTPSink(AlertSink):
+    """Email alerts. Uses STARTTLS and login only when a user is configured."""
+
+    def __init__(self, host=SMTP_SERVER, port=SMTP_PORT, sender=EMAIL_SENDER, receivers=None,
+                 user=SMTP_USER, password=SMTP_PASSWORD):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.receivers = receivers or EMAIL_RECEIVERS
+        self.user = user
+        self.password = password
+
+    def _send(self, subject, body):
+        msg = MIMEText(body)
+        msg["Subject"] = subject
+        msg["From"] = self.sender
+        msg["To"] = ", ".join(self.receivers)
+
+        with smtplib.SMTP(self.host, self.port, timeout=30) as server:
+            if self.user:
+                server.starttls()
+                server.login(self.user, self.password)
+            server.sendmail(self.sender, self.receivers, msg.as_string())
+
+    async def send(self, subject, body):
+        try:
+            await asyncio.to_thread(self._send, subject, body)
+            print("✅ Email alert sent successfully!")
+        except Exception as e:
+            print(f"❌ Failed to send email alert: {e}")
+
+
+def default_sinks():
+    sinks = [ConsoleSink()]
+    if EMAIL_RECEIVERS:
+        sinks.append(SMTPSink())
+    return sinks
+
+
+class Monitor:
+    """Checks every target on its own interval; state is kept in ``state_path`` between runs."""
+
+    def __init__(self, targets, sinks=None, state_path=STATE_FILE, max_concurrent=MAX_CONCURRENT_CHECKS):
+        self.targets = targets
+        self.sinks = default_sinks() if sinks is None else sinks
+        self.state_path = os.path.abspath(state_path)
+        self.state = self._load_state()
+        self._limit = None  # created inside the running event loop
+        self._max_concurrent = max_concurrent
+        self._state_lock = threading.Lock()
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_state(self):
+        with self._state_lock:
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+            tmp_path = f"{self.state_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(self.state, file, indent=2)
+            os.replace(tmp_path, self.state_path)
+
+    async def alert(self, subject, body):
+        # A broken custom sink must not stop the others or the check that raised the alert
+        results = await asyncio.gather(*(sink.send(subject, body) for sink in self.sinks), return_exceptions=True)
+        for sink, result in zip(self.sinks, results):
+            if isinstance(result, Exception):
+                print(f"❌ {type(sink).__name__} failed to send alert: {result}")
+
+    def _semaphore(self):
+        # Created on first use, inside the running event loop
+        if self._limit is None:
+            self._limit = asyncio.Semaphore(self._max_concurrent)
+        return self._limit
+
+    def _fetch(self, target, state):
+        """Conditional GET; returns the response, or None when the server says 304 Not Modified."""
+        headers = {}
+        if state.get("etag"):
+            headers["If-None-Match"] = state["etag"]
+        if state.get("last_modified"):
+            headers["If-Modified-Since"] = state["last_modified"]
+        response = http_client.get(target.url, headers=headers)
+        return None if response.status_code == 304 else response
+
+    async def check(self, target):
+        """Check one target now; returns ``"not-modified"``, ``"baseline"``, ``"unchanged"``, ``"changed"`` or ``"failed"``.
+
+        Any error (fetch, parse, an invalid selector, saving state) counts as a failed check
+        of this target only.
+        """
+        state = self.state.setdefault(target.name, {})
+        state["checked_at"] = time.time()
+        try:
+            return await self._check(target, state)
+        except Exception as e:
+            state["failures"] = state.get("failures", 0) + 1
+            print(f"❌ Failed to check {target.name}: {e}")
+            if state["failures"] == FAILURES_BEFORE_ALERT:
+                await self.alert(f"🚨 {target.name} checks failing", f"{target.url} failed {FAILURES_BEFORE_ALERT} checks in a row: {e}")
+            try:
+                self._save_state()
+            except OSError as save_error:
+                print(f"❌ Failed to save monitor state: {save_error}")
+            return "failed"
+
+    async def _check(self, target, state):
+        async with self._semaphore():
+            response = await asyncio.to_thread(self._fetch, target, state)
+
+        if response is None:
+            state["failures"] = 0
+            self._save_state()
+            return "not-modified"
+
+        structure = await asyncio.to_thread(table_structure, response.text, target.selector)
+        previous = state.get("structure")
+        state["failures"] = 0
+        state["etag"] = response.headers.get("ETag")
+        state["last_modified"] = response.headers.get("Last-Modified")
+        state["structure"] = structure
+        self._save_state()
+
+        if previous is None:
+            return "baseline"
+        changes = diff_structure(previous, structure)
+        if not changes:
+            return "unchanged"
+
+        await self.alert(
+            f"🚨 {target.name} website structure changed!",
+            f"The structure of {target.url} has changed. You may need to update the scraper.\n\n" + "\n".join(changes),
+        )
+        return "changed"
+
+    async def _watch(self, target):
+        # Spread first checks out so hundreds of targets do not all fire at once
+        await asyncio.sleep(random.uniform(0, min(target.interval, 60)))
+        while True:
+            started = time.monotonic()
+            try:
+                result = await self.check(target)
+            except Exception as e:
+                # check() already turns errors into "failed"; this keeps one target's bug from ending the others
+                result = f"failed ({e})"
+            print(f"🔎 {target.name}: {result}")
+            await asyncio.sleep(max(0.0, target.interval - (time.monotonic() - started)))
+
+    async def run(self, once=False):
+        self._limit = asyncio.Semaphore(self._max_concurrent)  # fresh for this event loop
+        if once:
+            results = await asyncio.gather(*(self.check(target) for target in self.targets))
+            return dict(zip((target.name for target in self.targets), results))
+        await asyncio.gather(*(self._watch(target) for target in self.targets))
+
+
+# Local SMTP stand-in for development: accepts every message and prints it
+async def _handle_smtp(reader, writer):
+    async def reply(line):
+        writer.write(f"{line}\r\n".encode())
+        await writer.drain()
+
+    await reply("220 localhost poultry-rag SMTP stand-in")
+    data, receiving = [], False
+    while line := await reader.readline():
+        text = line.decode(errors="replace").rstrip("\r\n")
+        if receiving:
+            if text == ".":
+                receiving = False
+                msg = message_from_string("\n".join(data))
+                subject = str(make_header(decode_header(msg["Subject"] or "")))
+                body = msg.get_payload(decode=True).decode(msg.get_content_charset() or "utf-8", errors="replace")
+                print(f"📨 Local SMTP mail to {msg['To']}: {subject}\n{body}")
+                data = []
+                await reply("250 OK")
+            else:
+                data.append(text[1:] if text.startswith("..") else text)
+            continue
+        command = text[:4].upper()
+        if command == "DATA":
+            receiving = True
+            await reply("354 End data with <CR><LF>.<CR><LF>")
+        elif command == "QUIT":
+            await reply("221 Bye")
+            break
+        else:
+            await reply("250 OK")
+    writer.close()
+
+
+async def start_local_smtp(host="localhost", port=SMTP_PORT):
+    return await asyncio.start_server(_handle_smtp, host, port)
+
+
+async def _serve(targets_path, once, smtp_debug):
+    monitor = Monitor(load_targets(targets_path))
+    if smtp_debug:
+        server = await start_local_smtp(port=SMTP_PORT)
+        if not any(isinstance(sink, SMTPSink) for sink in monitor.sinks):
+            monitor.sinks.append(SMTPSink(host="localhost", port=SMTP_PORT, receivers=["monitor@localhost"]))
+        async with server:
+            return await monitor.run(once=once)
+    return await monitor.run(once=once)
+
+
+def run_monitor(targets_path=TARGETS_FILE, once=False, smtp_debug=False):
+    """Run the monitor in a fresh event loop (forever unless ``once``)."""
+    results = asyncio.run(_serve(targets_path, once, smtp_debug))
+    for name, result in (results or {}).items():
+        print(f"🔎 {name}: {result}")
+
+
+def add_arguments(parser):
+    parser.add_argument("--targets", default=TARGETS_FILE, help="JSON file listing the pages to watch")
+    parser.add_argument("--once", action="store_true", help="Check every target once and exit")
+    parser.add_argument("--smtp-debug", action="store_true", help="Run a local SMTP stand-in that prints alerts")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    run_monitor(args.targets, args.once, args.smtp_debug)
+
+
+if __name__ == "__main__":
+    main()
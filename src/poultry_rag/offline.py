@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+import re
+import time
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+import numpy as np
+
+# ✅ Offline Settings
+# POULTRY_RAG_OFFLINE=1 swaps Groq, Gemini and every HTTP API (Google CSE, YouTube,
+# OpenWeather) for the local stand-ins below, so the full answer path runs with no
+# network and no API keys. Used by benchmarks/rag_benchmark.py.
+OFFLINE = os.getenv("POULTRY_RAG_OFFLINE") == "1"
+HTTP_DELAY = float(os.getenv("OFFLINE_HTTP_DELAY_MS", "0")) / 1000  # simulated API round trip
+TOKEN_DELAY = float(os.getenv("OFFLINE_TOKEN_DELAY_MS", "0")) / 1000  # simulated time per streamed token
+
+PLACEHOLDER_SECRET = "offline"
+ANSWER_SENTENCES = 3
+HASHING_DIM = 384  # same width as MiniLM, so indexes and centroids keep their shape
+
+
+def _words(text):
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+def _usage(prompt_text, output_text):
+    # Whitespace words stand in for tokens; close enough to compare prompt sizes
+    return len(prompt_text.split()), len(output_text.split())
+
+
+def extractive_answer(question, context, sentences=ANSWER_SENTENCES):
+    """The context sentences sharing the most words with the question, in document order."""
+    candidates = [s.strip() for s in re.split(r"(?<=[.!?])\s+|\n{2,}", context) if len(s.strip()) > 20]
+    if not candidates:
+        return "I don't know."
+    question_words = set(_words(question))
+    scored = sorted(
+        range(len(candidates)),
+        key=lambda i: len(question_words.intersection(_words(candidates[i]))),
+        reverse=True,
+    )
+    return " ".join(candidates[i] for i in sorted(scored[:sentences]))
+
+
+class StubChatModel:
+    """Stand-in for ChatGroq: streams an extractive answer built from the prompt's context."""
+
+    model_name = "offline-extractive"
+
+    def __init__(self, token_delay=TOKEN_DELAY):
+        self.token_delay = token_delay
+
+    def _answer(self, messages):
+        system = next((m.content for m in messages if m.type == "system"), "")
+        question = next((m.content for m in reversed(messages) if m.type == "human"), "")
+        if "----------------" not in system:
+            # Not an answer prompt (a question rewrite or a conversation summary): echo the input
+            return question
+        return extractive_answer(question, system.split("----------------", 1)[-1])
+
+    def stream(self, messages):
+        from langchain_core.messages import AIMessageChunk
+
+        text = self._answer(messages)
+        prompt_text = " ".join(m.content for m in messages)
+        for token in re.findall(r"\S+\s*", text):
+            if self.token_delay:
+                time.sleep(self.token_delay)
+            yield AIMessageChunk(content=token)
+        input_tokens, output_tokens = _usage(prompt_text, text)
+        yield AIMessageChunk(content="", usage_metadata={
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        })
+
+    def invoke(self, messages):
+        from langchain_core.messages import AIMessage
+
+        return AIMessage(content="".join(chunk.content for chunk in self.stream(messages)))
+
+
+class StubGeminiModel:
+    """Stand-in for ``genai.GenerativeModel``; answers the relevance prompt with YES."""
+
+    def __init__(self, name):
+        self.model_name = name
+
+    def generate_content(self, contents):
+        if isinstance(contents, str):
+            contents = [contents]
+        prompt = " ".join(part for part in contents if isinstance(part, str))
+        text = "YES" if '"YES"' in prompt else "Offline stand-in response; no model was called."
+        prompt_tokens, output_tokens = _usage(prompt, text)
+        return SimpleNamespace(
+            text=text,
+            usage_metadata=SimpleNamespace(prompt_token_count=prompt_tokens, candidates_token_count=output_tokens),
+        )
+
+
+def _search_payload(params):
+    query = params.get("q", "")
+    return {"items": [
+        {
+            "title": f"{query} — reference {i + 1}",
+            "link": f"https://example.org/poultry/{i + 1}",
+            "snippet": f"Offline search result {i + 1} for '{query}'.",
+        }
+        for i in range(int(params.get("num", 5)))
+    ]}
+
+
+def _youtube_payload(params):
+    query = params.get("q", "")
+    return {"items": [
+        {
+            "id": {"videoId": f"offline{i + 1:04d}"},
+            "snippet": {
+                "title": f"{query} (video {i + 1})",
+                "channelTitle": "Offline Poultry Channel",
+                "description": f"Offline video result {i + 1}. Not a real video.",
+            },
+        }
+        for i in range(int(params.get("maxResults", 5)))
+    ]}
+
+
+def _weather_payload(params):
+    return {
+        "main": {"temp": 31.0, "humidity": 60},
+        "wind": {"speed": 4.0},
+        "weather": [{"description": "clear sky"}],
+        "name": params.get("q", ""),
+    }
+
+
+# (host, path prefix) -> canned JSON for the APIs the app calls
+ROUTES = [
+    ("www.googleapis.com", "/customsearch/", _search_payload),
+    ("www.googleapis.com", "/youtube/", _youtube_payload),
+    ("api.openweathermap.org", "/data/", _weather_payload),
+]
+
+
+class StubSession:
+    """Drop-in for the pooled ``requests.Session``: canned JSON for known APIs, 404 otherwise."""
+
+    def __init__(self, delay=HTTP_DELAY):
+        self.delay = delay
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        import requests
+
+        if self.delay:
+            time.sleep(self.delay)
+        parts = urlsplit(url)
+        payload = next(
+            (build(params or {}) for host, prefix, build in ROUTES
+             if parts.netloc == host and parts.path.startswith(prefix)),
+            None,
+        )
+        response = requests.Response()
+        response.url = url
+        response.status_code = 200 if payload is not None else 404
+        response.headers["Content-Type"] = "application/json"
+        response._content = json.dumps(payload or {"error": "no offline route"}).encode("utf-8")
+        return response
+
+
+class HashingEncoder:
+    """Model-free stand-in for SentenceTransformer (``EMBED_BACKEND=hashing``).
+
+    Unigrams and bigrams are hashed into a fixed-width signed bag of words, so
+    lexically similar texts get similar vectors. Good enough to exercise and time
+    the pipeline without downloading a model; not a substitute for its quality.
+    """
+
+    def __init__(self, dim=HASHING_DIM):
+        self.dim = dim
+
+    def _vector(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        words = _words(text)
+        for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dim
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        return vector
+
+    def encode(self, texts, batch_size=None, normalize_embeddings=True, convert_to_numpy=True):
+        vectors = np.stack([self._vector(text) for text in texts]) if texts else np.zeros((0, self.dim), np.float32)
+        if normalize_embeddings:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.where(norms == 0, 1.0, norms)
+        return vectors
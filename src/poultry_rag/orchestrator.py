@@ -0,0 +1,82 @@
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, wait, FIRST_COMPLETED
+
+from tracing import count
+
+# ✅ Shared pool for the remote lookups of a chat turn. It is never shut down per
+# request: a lookup that misses its deadline keeps running in the background
+# instead of blocking the answer.
+LOOKUP_WORKERS = int(os.getenv("LOOKUP_WORKERS", "16"))
+_executor = ThreadPoolExecutor(max_workers=LOOKUP_WORKERS, thread_name_prefix="lookup")
+
+# Seconds each source may take, measured from the moment it was submitted
+DEFAULT_TIMEOUTS = {
+    "relevance": 10,
+    "web": 8,
+    "videos": 8,
+}
+
+DEFAULT_FALLBACKS = {
+    "web": "❌ No web search results available.",
+    "videos": "❌ No video results available.",
+}
+
+
+class Lookup:
+    """A submitted lookup with its own deadline."""
+
+    def __init__(self, name, func, timeout):
+        self.name = name
+        self.timeout = timeout
+        self.submitted = time.perf_counter()
+        self.elapsed = None
+        self.ok = False
+        # Run in a copy of the caller's context so tracing spans keep their parent
+        self.future = _executor.submit(contextvars.copy_context().run, self._run, func)
+
+    def _run(self, func):
+        try:
+            return func()
+        finally:
+            self.elapsed = time.perf_counter() - self.submitted
+
+    def result(self, fallback=None):
+        """Wait until the deadline at most; return ``fallback`` on timeout or error."""
+        remaining = self.submitted + self.timeout - time.perf_counter()
+        try:
+            result = self.future.result(timeout=max(0.0, remaining))
+            self.ok = True
+            return result
+        except TimeoutError:
+            print(f"⏱️ {self.name} lookup timed out after {self.timeout}s")
+            count(f"lookup.{self.name}.timeout")
+            return fallback
+        except Exception as e:
+            print(f"❌ {self.name} lookup failed: {e}")
+            count(f"lookup.{self.name}.error")
+            return fallback
+
+
+def submit_lookups(tasks, timeouts=None):
+    """Start every ``name -> callable`` task at once and return their ``Lookup`` handles."""
+    timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+    return {name: Lookup(name, func, timeouts.get(name, 30)) for name, func in tasks.items()}
+
+
+def as_completed(lookups, fallbacks=None):
+    """Yield ``(name, result)`` pairs in the order the lookups finish or hit their deadline."""
+    fallbacks = {**DEFAULT_FALLBACKS, **(fallbacks or {})}
+    pending = dict(lookups)
+    while pending:
+        now = time.perf_counter()
+        next_deadline = min(lookup.submitted + lookup.timeout for lookup in pending.values())
+        wait([lookup.future for lookup in pending.values()],
+             timeout=max(0.0, next_deadline - now), return_when=FIRST_COMPLETED)
+
+        now = time.perf_counter()
+        for name, lookup in list(pending.items()):
+            if lookup.future.done() or now >= lookup.submitted + lookup.timeout:
+                del pending[name]
+                yield name, lookup.result(fallbacks.get(name))
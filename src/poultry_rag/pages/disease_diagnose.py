@@ -1,19 +1,73 @@
+import time
+
 import streamlit as st
 from PIL import Image
-from utils import diagnose_poultry_disease
+from diagnosis import diagnose_poultry_disease_batch, diagnose_poultry_disease_with_metrics, summarize_flock_diagnoses
+
+
+def metrics_caption(metrics):
+    if metrics["cache_hit"]:
+        return f"⚡ Same or near-identical photo diagnosed before, served from cache in {metrics['latency_ms']} ms"
+    return (
+        f"📦 Uploaded {metrics['upload_bytes'] / 1024:.0f} KB "
+        f"({metrics['original_size'][0]}×{metrics['original_size'][1]} → {metrics['sent_size'][0]}×{metrics['sent_size'][1]}) "
+        f"in {metrics['latency_ms'] / 1000:.1f}s"
+    )
+
 
 # Disease Diagnosis Page
 st.title("🐔 Poultry Disease Diagnosis")
-st.subheader("Upload an image to detect poultry diseases")
-
-diagnosis_image = st.file_uploader("Upload a chicken image for diagnosis", type=["jpg", "png", "jpeg"])
-
-if diagnosis_image:
-    img = Image.open(diagnosis_image)
-    st.image(img, caption="Uploaded Image", use_container_width=True)
-    
-    with st.spinner("Analyzing the image..."):
-        diagnosis = diagnose_poultry_disease(img)
-    
-    st.subheader("🩺 Diagnosis Result")
-    st.write(diagnosis)
+mode = st.radio("Mode", ["Single photo", "Batch (whole flock)"], horizontal=True)
+
+if mode == "Single photo":
+    st.subheader("Upload an image to detect poultry diseases")
+
+    diagnosis_image = st.file_uploader("Upload a chicken image for diagnosis", type=["jpg", "png", "jpeg"])
+
+    if diagnosis_image:
+        img = Image.open(diagnosis_image)
+        st.image(img, caption="Uploaded Image", use_container_width=True)
+
+        with st.spinner("Analyzing the image..."):
+            diagnosis, metrics = diagnose_poultry_disease_with_metrics(img)
+
+        st.subheader("🩺 Diagnosis Result")
+        st.write(diagnosis)
+        st.caption(metrics_caption(metrics))
+
+else:
+    st.subheader("Upload photos of several birds from the same house")
+
+    flock_images = st.file_uploader(
+        "Upload chicken images for diagnosis", type=["jpg", "png", "jpeg"], accept_multiple_files=True
+    )
+
+    if flock_images and st.button(f"🩺 Diagnose {len(flock_images)} photos"):
+        started = time.perf_counter()
+        progress = st.progress(0.0, text="Queued...")
+        results, failed, cache_hits = [], [], 0
+
+        images = [(file.name, lambda file=file: Image.open(file)) for file in flock_images]
+        for done, (name, diagnosis, metrics) in enumerate(diagnose_poultry_disease_batch(images), start=1):
+            progress.progress(done / len(images), text=f"Diagnosed {done} of {len(images)} photos")
+            if diagnosis is None:
+                failed.append(name)
+                st.error(f"❌ {name}: {metrics['error']}")
+                continue
+
+            results.append((name, diagnosis))
+            cache_hits += metrics["cache_hit"]
+            with st.expander(f"🐔 {name}"):
+                st.write(diagnosis)
+                st.caption(metrics_caption(metrics))
+
+        progress.empty()
+        st.caption(
+            f"⏱️ {len(results)} photos diagnosed in {time.perf_counter() - started:.1f}s "
+            f"({cache_hits} from cache, {len(failed)} failed)"
+        )
+
+        if results:
+            st.subheader("📋 Flock Summary")
+            with st.spinner("Summarizing the flock..."):
+                st.write(summarize_flock_diagnoses(results))
@@ -1,23 +1,53 @@
+import pandas as pd
 import streamlit as st
-from utils import get_egg_prices
+from egg_analytics import ROLLING_DAYS, latest_spreads, load_analytics
+from egg_store import EggPriceStore, get_egg_prices
 
 # Page Title
 st.title("🥚 Daily Poultry Egg Rates!")
 st.subheader("Updated rates from [eggrates.pk](https://eggrates.pk)")
 
-# Fetch egg prices
+# Read egg prices from the local store (kept fresh by `poultry-rag scrape-eggs`)
 egg_data = get_egg_prices()
 
 # Check if data is valid
 if isinstance(egg_data, list) and egg_data and isinstance(egg_data[0], dict):
-    for entry in egg_data:
-        st.markdown(f"## 📍 {entry.get('City', 'Unknown City')}")  # City name as header
-        st.write(f"📅 **Updated Today**")
+    # Typed prices with rolling averages, changes and spreads, precomputed when the data landed
+    analytics = load_analytics(EggPriceStore())
+    latest = analytics[analytics["day"] == analytics.groupby("city")["day"].transform("max")]
+    today = pd.Timestamp.today().normalize()
 
-        # Display egg price details
-        for price_entry in entry.get("Prices", []):
-            st.write(f"📌 **{price_entry['Quantity']}** → 💰 **{price_entry['Price']} PKR**")
+    for city, rows in latest.groupby("city", sort=False):
+        st.markdown(f"## 📍 {city}")  # City name as header
+        day = rows["day"].iloc[0]
+        st.write("📅 **Updated Today**" if day == today else f"📅 **Last updated {day:%Y-%m-%d}**")
+
+        # Display egg price details with the change since the previous snapshot
+        columns = st.columns(min(len(rows), 4))
+        for index, row in enumerate(rows.itertuples()):
+            columns[index % len(columns)].metric(
+                row.quantity,
+                f"{row.price_pkr:,.0f} PKR" if pd.notna(row.price_pkr) else "–",
+                f"{row.change:+,.0f} PKR" if pd.notna(row.change) else None,
+            )
+        for row in rows[rows["anomaly"]].itertuples():
+            st.warning(f"⚠️ Unusual {row.quantity} price: {row.zscore:+.1f}σ from the last weeks")
 
         st.divider()  # Add a divider for better readability
+
+    # Price history per city
+    st.subheader("📈 Price History")
+    city = st.selectbox("City", sorted(analytics["city"].unique()))
+    if city:
+        history = analytics[analytics["city"] == city]
+        quantity = st.selectbox("Quantity", sorted(history["quantity"].unique()))
+        series = history[history["quantity"] == quantity].set_index("day")
+        st.line_chart(series[["price_pkr", f"rolling_{ROLLING_DAYS}d"]].rename(
+            columns={"price_pkr": "Price (PKR)", f"rolling_{ROLLING_DAYS}d": f"{ROLLING_DAYS}-day average"}
+        ))
+
+    st.subheader("🗺️ City Spreads")
+    st.caption("Latest price versus the median city, in percent")
+    st.dataframe(latest_spreads(analytics), use_container_width=True)
 else:
     st.error("⚠️ Unable to fetch egg price data. Please try again later.")
@@ -1,5 +1,6 @@
 import streamlit as st
-from utils import analyze_lab_report, process_uploaded_file
+from report_analysis import analyze_lab_report_stream
+from lab_extract import iter_uploaded_file
 
 # Page Title
 st.title("🧪 Laboratory Report Analysis")
@@ -7,14 +8,36 @@ st.title("🧪 Laboratory Report Analysis")
 # Upload File (PDF, CSV, TXT, JPG, PNG)
 st.subheader("📤 Upload Veterinary Lab Report")
 uploaded_file = st.file_uploader("Upload a lab report", type=["pdf", "csv", "txt", "jpg", "png"])
-uploaded_text = process_uploaded_file(uploaded_file) if uploaded_file else ""
 
-if uploaded_text:
-    st.success("✅ File processed successfully! AI is analyzing the report...")
+if uploaded_file:
+    st.success("✅ File received! AI analyzes each part of the report as soon as it is extracted...")
+    progress = st.empty()
 
-    # AI Analysis using Gemini 1.5 Flash
-    analysis_result = analyze_lab_report(uploaded_text)
+    def extracted_sections():
+        # Pages stream into the analysis while later (scanned) pages are still being read
+        for label, text in iter_uploaded_file(uploaded_file):
+            progress.info(f"📄 Extracted {label}...")
+            yield label, text
 
-    # Display the AI Analysis
+    # AI Analysis using Gemini (map-reduce for long reports)
     st.subheader("📑 AI Report Analysis")
-    st.write(analysis_result)
+    final_area = st.container()
+    partials_area = st.container()
+
+    try:
+        with st.spinner("Analyzing the report..."):
+            parts_done = 0
+            for kind, label, text, cached in analyze_lab_report_stream(extracted_sections()):
+                note = " (cached)" if cached else ""
+                if kind == "partial":
+                    parts_done += 1
+                    progress.info(f"🔎 {parts_done} part(s) analyzed, latest: {label}{note}")
+                    with partials_area.expander(f"🔎 Findings: {label}{note}"):
+                        st.write(text)
+                else:
+                    progress.empty()
+                    final_area.write(text)
+                    if cached:
+                        final_area.caption("⚡ Same report analyzed before, result served from cache.")
+    except Exception as e:
+        st.error(f"Error analyzing lab report: {str(e)}")
@@ -1,15 +1,103 @@
+import time
+
+import numpy as np
 import streamlit as st
-from utils import calculate_profit
+from profit_sim import DEFAULT_ASSUMPTIONS, calculate_profit, egg_price_history, sensitivity, simulate, summarize
 
 st.title("📊 Poultry Farm Profit Calculator")
 
-# User inputs
-feed_cost = st.number_input("🐔 Feed Cost (PKR)", min_value=0)
-medicine_cost = st.number_input("💊 Medicine Cost (PKR)", min_value=0)
-labor_cost = st.number_input("👨‍🌾 Labor Cost (PKR)", min_value=0)
-egg_sales = st.number_input("🥚 Egg Sales (PKR)", min_value=0)
-meat_sales = st.number_input("🍗 Meat Sales (PKR)", min_value=0)
+quick_tab, simulation_tab = st.tabs(["🧮 Quick Calculator", "🎲 Flock Simulation"])
+
+with quick_tab:
+    # User inputs
+    feed_cost = st.number_input("🐔 Feed Cost (PKR)", min_value=0)
+    medicine_cost = st.number_input("💊 Medicine Cost (PKR)", min_value=0)
+    labor_cost = st.number_input("👨‍🌾 Labor Cost (PKR)", min_value=0)
+    egg_sales = st.number_input("🥚 Egg Sales (PKR)", min_value=0)
+    meat_sales = st.number_input("🍗 Meat Sales (PKR)", min_value=0)
+
+    if st.button("Calculate Profit"):
+        profit = calculate_profit(feed_cost, medicine_cost, labor_cost, egg_sales, meat_sales)
+        st.success(f"💰 Your Poultry Farm Profit: PKR {profit}")
+
+with simulation_tab:
+    st.caption("Monte Carlo over one laying cycle: lay rate, mortality, feed conversion and prices vary per scenario.")
+    d = DEFAULT_ASSUMPTIONS
+
+    col1, col2 = st.columns(2)
+    flock_size = col1.number_input("🐔 Birds placed", min_value=100, value=d["flock_size"], step=500)
+    weeks = col2.number_input("📅 Weeks in lay", min_value=4, max_value=90, value=d["weeks"])
+    peak_rate = col1.slider("🥚 Peak lay rate (%)", 50, 100, int(d["peak_rate"][0] * 100))
+    mortality = col2.number_input("☠️ Weekly mortality (%)", min_value=0.0, max_value=5.0,
+                                  value=d["weekly_mortality"][0] * 100, step=0.05, format="%.2f")
+    fcr = col1.number_input("🌾 Feed conversion (kg feed / kg eggs)", min_value=1.0, value=d["fcr"][0], step=0.05)
+    feed_price = col2.number_input("🌾 Feed price (PKR/kg)", min_value=0.0, value=d["feed_price"][0], step=5.0)
+    pullet_cost = col1.number_input("🐣 Pullet cost (PKR/bird)", min_value=0.0, value=d["pullet_cost"], step=50.0)
+    labor = col2.number_input("👨‍🌾 Labor (PKR/week)", min_value=0.0, value=d["labor_per_week"], step=5000.0)
+    medicine = col1.number_input("💊 Medicine (PKR/bird/week)", min_value=0.0,
+                                 value=d["medicine_per_bird_week"], step=0.5)
+    spent_hen = col2.number_input("🍗 Spent hen price (PKR/bird)", min_value=0.0, value=d["spent_hen_price"], step=25.0)
+
+    price_source = st.radio("Egg price (per dozen)", ["Scraped price history", "Manual"], horizontal=True)
+    egg_prices = egg_price_history() if price_source == "Scraped price history" else None
+    if price_source == "Scraped price history" and egg_prices is None:
+        st.info("ℹ️ Not enough scraped history yet, using the manual price below.")
+    if egg_prices is None:
+        col1, col2 = st.columns(2)
+        egg_mean = col1.number_input("Mean (PKR)", min_value=0.0, value=d["egg_price"][0], step=10.0)
+        egg_std = col2.number_input("Std. deviation (PKR)", min_value=0.0, value=d["egg_price"][1], step=5.0)
+    else:
+        egg_mean, egg_std = d["egg_price"]
+        st.caption(f"📈 Drawing from {len(egg_prices)} scraped prices "
+                   f"(mean {egg_prices.mean():,.0f}, range {egg_prices.min():,.0f}–{egg_prices.max():,.0f} PKR)")
+
+    scenarios = st.select_slider("Scenarios", options=[1000, 5000, 10000, 25000, 50000], value=10000)
+
+    if st.button("Run Simulation"):
+        assumptions = {
+            "flock_size": flock_size,
+            "weeks": weeks,
+            "peak_rate": (peak_rate / 100, d["peak_rate"][1]),
+            "weekly_mortality": (mortality / 100, d["weekly_mortality"][1]),
+            "fcr": (fcr, d["fcr"][1]),
+            "feed_price": (feed_price, d["feed_price"][1]),
+            "egg_price": (egg_mean, egg_std),
+            "pullet_cost": pullet_cost,
+            "labor_per_week": labor,
+            "medicine_per_bird_week": medicine,
+            "spent_hen_price": spent_hen,
+        }
+
+        started = time.perf_counter()
+        result = simulate(assumptions, scenarios, egg_prices)
+        summary = summarize(result)
+        swings = sensitivity(assumptions, egg_prices)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Expected profit", f"PKR {summary['mean'] / 1e6:,.2f}M")
+        col2.metric("Bad case (P5)", f"PKR {summary['p5'] / 1e6:,.2f}M")
+        col3.metric("Good case (P95)", f"PKR {summary['p95'] / 1e6:,.2f}M")
+        col4.metric("Chance of loss", f"{summary['prob_loss']:.1%}")
+        st.caption(
+            f"⚡ {scenarios:,} scenarios + sensitivity in {elapsed_ms:.0f} ms · "
+            f"{summary['mean_eggs'] / 1e6:,.2f}M eggs expected · "
+            f"cost PKR {summary['mean_cost_per_dozen']:,.0f} per dozen"
+        )
+
+        import pandas as pd  # only needed for the charts
+
+        st.subheader("📊 Profit Distribution")
+        counts, edges = np.histogram(result["profit"] / 1e6, bins=40)
+        st.bar_chart(pd.DataFrame({"Scenarios": counts}, index=np.round((edges[:-1] + edges[1:]) / 2, 2)))
 
-if st.button("Calculate Profit"):
-    profit = calculate_profit(feed_cost, medicine_cost, labor_cost, egg_sales, meat_sales)
-    st.success(f"💰 Your Poultry Farm Profit: PKR {profit}")
+        st.subheader("🎯 Sensitivity")
+        st.caption("Mean profit with each input one standard deviation below and above its mean (PKR millions)")
+        st.bar_chart(
+            pd.DataFrame(
+                {"Low": [low / 1e6 for _, low, _ in swings], "High": [high / 1e6 for _, _, high in swings]},
+                index=[name.replace("_", " ") for name, _, _ in swings],
+            ),
+            horizontal=True,
+            stack=False,
+        )
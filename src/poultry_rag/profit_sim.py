@@ -0,0 +1,162 @@
+import numpy as np
+
+# ✅ Simulation Settings
+# Each uncertain input is (mean, standard deviation); plain numbers are fixed.
+DEFAULT_ASSUMPTIONS = {
+    "flock_size": 10000,  # birds placed
+    "weeks": 52,  # weeks in lay
+    "start_age": 20,  # age in weeks at first egg
+    "peak_age": 28,  # age in weeks at peak production
+    "peak_rate": (0.92, 0.03),  # hen-day lay rate at peak
+    "weekly_decline": (0.005, 0.0015),  # drop in lay rate per week after peak
+    "weekly_mortality": (0.001, 0.0004),  # share of live birds lost per week
+    "fcr": (2.1, 0.12),  # kg feed per kg egg mass
+    "egg_mass_kg": 0.06,
+    "feed_price": (110.0, 12.0),  # PKR per kg
+    "egg_price": (330.0, 35.0),  # PKR per dozen (used when no price history is given)
+    "pullet_cost": 900.0,  # PKR per bird placed
+    "medicine_per_bird_week": 1.5,  # PKR
+    "labor_per_week": 60000.0,  # PKR
+    "spent_hen_price": 450.0,  # PKR per live bird sold at the end of lay
+}
+
+SCENARIOS = 10000
+SENSITIVITY_SCENARIOS = 2000
+PRICE_HISTORY_MIN_SAMPLES = 10
+
+
+# Poultry Farm Profit Calculator
+def calculate_profit(feed_cost, medicine_cost, labor_cost, egg_sales, meat_sales):
+    total_cost = feed_cost + medicine_cost + labor_cost
+    total_revenue = egg_sales + meat_sales
+    profit = total_revenue - total_cost
+    return profit
+
+
+def _draw(rng, spec, size, low=0.0, high=None):
+    if not isinstance(spec, tuple):
+        return np.full(size, float(spec))
+    mean, std = spec
+    return np.clip(rng.normal(mean, std, size), low, high)
+
+
+def laying_curve(weeks, start_age, peak_age, peak_rate, weekly_decline):
+    """Hen-day lay rate per scenario and week, shape ``(scenarios, weeks)``.
+
+    Linear ramp from first egg to the peak, then a linear decline per week.
+    """
+    age = start_age + np.arange(weeks)
+    ramp = np.clip((age - start_age + 1) / max(peak_age - start_age + 1, 1), 0.0, 1.0)
+    weeks_past_peak = np.maximum(age - peak_age, 0)
+    decline = np.clip(1.0 - weekly_decline[:, None] * weeks_past_peak[None, :], 0.0, 1.0)
+    return peak_rate[:, None] * ramp[None, :] * decline
+
+
+def simulate(assumptions=None, scenarios=SCENARIOS, egg_prices=None, seed=None):
+    """Monte Carlo cost/revenue model of one laying cycle; returns a dict of per-scenario arrays (PKR).
+
+    ``egg_prices`` is an optional array of observed per-dozen prices (e.g. the
+    scraped history); each scenario then draws its price level from it instead
+    of from the ``egg_price`` normal distribution.
+    """
+    a = {**DEFAULT_ASSUMPTIONS, **(assumptions or {})}
+    rng = np.random.default_rng(seed)
+    weeks = int(a["weeks"])
+
+    peak_rate = _draw(rng, a["peak_rate"], scenarios, high=1.0)
+    weekly_decline = _draw(rng, a["weekly_decline"], scenarios)
+    mortality = _draw(rng, a["weekly_mortality"], scenarios, high=1.0)
+    fcr = _draw(rng, a["fcr"], scenarios)
+    feed_price = _draw(rng, a["feed_price"], scenarios)
+    if egg_prices is not None and len(egg_prices):
+        egg_price = rng.choice(np.asarray(egg_prices, dtype=np.float64), scenarios)
+    else:
+        egg_price = _draw(rng, a["egg_price"], scenarios)
+
+    # Birds alive in each week, then eggs laid by them
+    alive = a["flock_size"] * (1.0 - mortality[:, None]) ** np.arange(1, weeks + 1)[None, :]
+    lay_rate = laying_curve(weeks, a["start_age"], a["peak_age"], peak_rate, weekly_decline)
+    eggs = (alive * lay_rate * 7).sum(axis=1)
+
+    feed_cost = eggs * a["egg_mass_kg"] * fcr * feed_price
+    other_costs = (
+        a["flock_size"] * a["pullet_cost"]
+        + alive.sum(axis=1) * a["medicine_per_bird_week"]
+        + weeks * a["labor_per_week"]
+    )
+    egg_sales = eggs / 12 * egg_price
+    meat_sales = alive[:, -1] * a["spent_hen_price"]
+    revenue = egg_sales + meat_sales
+    cost = feed_cost + other_costs
+
+    return {
+        "profit": revenue - cost,
+        "revenue": revenue,
+        "cost": cost,
+        "feed_cost": feed_cost,
+        "egg_sales": egg_sales,
+        "meat_sales": meat_sales,
+        "eggs": eggs,
+        "mortality_pct": (1.0 - alive[:, -1] / a["flock_size"]) * 100,
+    }
+
+
+def summarize(result):
+    profit = result["profit"]
+    p5, p50, p95 = np.percentile(profit, [5, 50, 95])
+    return {
+        "mean": float(profit.mean()),
+        "p5": float(p5),
+        "p50": float(p50),
+        "p95": float(p95),
+        "prob_loss": float((profit < 0).mean()),
+        "mean_eggs": float(result["eggs"].mean()),
+        "mean_cost_per_dozen": float((result["cost"] / (result["eggs"] / 12)).mean()),
+    }
+
+
+def sensitivity(assumptions=None, egg_prices=None, scenarios=SENSITIVITY_SCENARIOS, seed=0):
+    """Mean profit with each uncertain input fixed one standard deviation low and high.
+
+    Returns ``[(name, low_profit, high_profit)]`` sorted by swing, widest first.
+    All runs share ``seed`` so the differences come from the input alone.
+    """
+    a = {**DEFAULT_ASSUMPTIONS, **(assumptions or {})}
+    rows = []
+    for name, spec in a.items():
+        if not isinstance(spec, tuple):
+            continue
+        if name == "egg_price" and egg_prices is not None and len(egg_prices):
+            mean, std = float(np.mean(egg_prices)), float(np.std(egg_prices))
+            prices = None  # fixed price level for this input only
+        else:
+            mean, std = spec
+            prices = egg_prices
+        low, high = (
+            simulate({**a, name: max(mean - std, 0.0)}, scenarios, prices, seed)["profit"].mean(),
+            simulate({**a, name: mean + std}, scenarios, prices, seed)["profit"].mean(),
+        )
+        rows.append((name, float(low), float(high)))
+    return sorted(rows, key=lambda row: abs(row[2] - row[1]), reverse=True)
+
+
+def egg_price_history(days=180, city=None):
+    """Observed per-dozen prices from the scraped store (last ``days``), or None if there are too few."""
+    import sqlite3
+    from contextlib import closing
+    from datetime import date, timedelta
+
+    from egg_store import EggPriceStore
+
+    query = "SELECT price_pkr FROM prices WHERE quantity LIKE '%dozen%' AND price_pkr IS NOT NULL AND day >= ?"
+    params = [(date.today() - timedelta(days=days)).isoformat()]
+    if city:
+        query += " AND city = ?"
+        params.append(city)
+    try:
+        with closing(sqlite3.connect(EggPriceStore().path, timeout=10)) as conn:
+            prices = np.array([row[0] for row in conn.execute(query, params)], dtype=np.float64)
+    except Exception as e:
+        print(f"⚠️ Egg price history unavailable: {e}")
+        return None
+    return prices if len(prices) >= PRICE_HISTORY_MIN_SAMPLES else None
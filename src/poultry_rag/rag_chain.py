@@ -0,0 +1,96 @@
+import time
+
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+from hybrid_search import CHILDREN_PER_PARENT, expand_to_parents, hybrid_search
+from tracing import count, record, span
+
+# ✅ Same prompt as the RetrievalQA "stuff" chain this replaces, plus the conversation so far
+STUFF_PROMPT = ChatPromptTemplate.from_messages([
+    (
+        "system",
+        "Use the following pieces of context to answer the user's question. \n"
+        "If you don't know the answer, just say that you don't know, don't try to make up an answer.\n"
+        "----------------\n{context}",
+    ),
+    MessagesPlaceholder("history", optional=True),
+    ("human", "{question}"),
+])
+
+KB_FALLBACK = "❌ No knowledge base results."
+
+
+def retrieve(vectorstore, query, query_vector, k=3):
+    """Top-k sections by hybrid BM25 + dense search over their chunks, reusing the computed query embedding."""
+    with span("retrieve", k=k) as stage:
+        chunks = hybrid_search(vectorstore, query, query_vector, k=k * CHILDREN_PER_PARENT)
+        docs = expand_to_parents(vectorstore, chunks, k)
+        stage.set(chunks=len(chunks), docs=len(docs), context_chars=sum(len(doc.page_content) for doc in docs))
+        return docs
+
+
+def format_context(docs):
+    return "\n\n".join(doc.page_content for doc in docs)
+
+
+class StreamedAnswer:
+    """Iterable of answer tokens from the LLM that records time-to-first-token.
+
+    ``started`` is when the user's turn began, so ``ttft`` is what the user waits
+    before text appears, not just the LLM's own latency. ``history`` is earlier
+    turns as chat messages (see ``memory.ConversationMemory.messages``).
+    """
+
+    def __init__(self, llm, question, docs, started=None, history=None):
+        self.llm = llm
+        self.messages = STUFF_PROMPT.format_messages(
+            context=format_context(docs), question=question, history=history or []
+        )
+        self.started = started if started is not None else time.perf_counter()
+        self.ttft = None
+        self.total = None
+        self.text = ""
+        self.ok = False
+        self.usage = {}
+
+    def __iter__(self):
+        generation_started = time.perf_counter()
+        first_token = None
+        chunks = 0
+        error = None
+        try:
+            for chunk in self.llm.stream(self.messages):
+                if getattr(chunk, "usage_metadata", None):
+                    self.usage = chunk.usage_metadata
+                if not chunk.content:
+                    continue
+                if self.ttft is None:
+                    self.ttft = time.perf_counter() - self.started
+                    first_token = time.perf_counter() - generation_started
+                chunks += 1
+                self.text += chunk.content
+                yield chunk.content
+            self.ok = bool(self.text)
+        except Exception as e:
+            error = e
+            print(f"❌ Knowledge base answer failed: {e}")
+        finally:
+            self.total = time.perf_counter() - self.started
+            # Streamed chunks stand in for output tokens when the provider reports no usage
+            output_tokens = self.usage.get("output_tokens", chunks)
+            count("llm.output_tokens", output_tokens)
+            record(
+                "llm.generate",
+                (time.perf_counter() - generation_started) * 1000,
+                error,
+                model=getattr(self.llm, "model_name", type(self.llm).__name__),
+                first_token_ms=round(first_token * 1000, 1) if first_token is not None else None,
+                prompt_chars=sum(len(message.content) for message in self.messages),
+                prompt_tokens=self.usage.get("input_tokens"),
+                output_tokens=output_tokens,
+                answer_chars=len(self.text),
+            )
+
+        if not self.text:
+            self.text = KB_FALLBACK
+            yield KB_FALLBACK
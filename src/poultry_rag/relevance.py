@@ -0,0 +1,105 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from tracing import count
+
+# ✅ Gate Settings (cosine similarity of the query to the nearest corpus topic centroid)
+ACCEPT_THRESHOLD = float(os.getenv("RELEVANCE_ACCEPT", "0.45"))
+REJECT_THRESHOLD = float(os.getenv("RELEVANCE_REJECT", "0.20"))
+DECISION_CACHE_SIZE = int(os.getenv("RELEVANCE_CACHE_SIZE", "4096"))
+
+# Words that make a query poultry-related on their own
+POULTRY_TERMS = {
+    "poultry", "chicken", "chickens", "hen", "hens", "rooster", "broiler", "broilers", "fowl", "avian",
+    "hatchery", "brooder", "brooding", "coccidiosis", "newcastle", "gumboro", "marek", "mareks", "coryza",
+    "laryngotracheitis", "fowlpox", "leucosis", "murghi", "murgi", "anday",
+}
+# Words with common meanings outside poultry ("turkey", "feed", "bird", "influenza");
+# a query needs MIN_SHARED_HITS of them to count as poultry-related by words alone
+SHARED_TERMS = {
+    "chick", "chicks", "layer", "layers", "egg", "eggs", "flock", "flocks", "bird", "birds", "duck",
+    "ducks", "turkey", "turkeys", "quail", "hatching", "incubator", "coop", "feed", "fcr", "vaccine",
+    "vaccination", "ibd", "mycoplasma", "salmonella", "aspergillosis", "bronchitis", "influenza",
+}
+MIN_SHARED_HITS = 2
+
+
+def normalize_query(query):
+    return " ".join(re.findall(r"[a-z0-9']+", query.lower()))
+
+
+class RelevanceGate:
+    """Local first-stage relevance check; only ambiguous queries reach ``llm_check``.
+
+    A query is accepted if it names a poultry term (or two shared ones) or sits
+    close to a topic centroid of the indexed manuals, rejected if it is far from
+    all of them, and escalated to the LLM in between. Every decision is cached by normalized query text.
+    """
+
+    def __init__(self, centroids, llm_check, accept=ACCEPT_THRESHOLD, reject=REJECT_THRESHOLD,
+                 cache_size=DECISION_CACHE_SIZE):
+        self.centroids = None if centroids is None else np.asarray(centroids, dtype=np.float32)
+        self.llm_check = llm_check
+        self.accept = accept
+        self.reject = reject
+        self.cache_size = cache_size
+        self.counts = {"cache": 0, "keyword": 0, "accepted": 0, "rejected": 0, "llm": 0}
+        self._decisions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def is_relevant(self, query, query_vector):
+        decision = self.local_decision(query, query_vector)
+        if decision is not None:
+            return decision
+        decision = bool(self.llm_check(query))
+        self._remember(normalize_query(query), decision, "llm")
+        return decision
+
+    def local_decision(self, query, query_vector):
+        """Cached or local verdict, or None when only ``llm_check`` can tell."""
+        key = normalize_query(query)
+        with self._lock:
+            if key in self._decisions:
+                self._decisions.move_to_end(key)
+                self.counts["cache"] += 1
+                count("relevance.cache")
+                return self._decisions[key]
+
+        decision, source = self._decide(key, query_vector)
+        if decision is not None:
+            self._remember(key, decision, source)
+        return decision
+
+    def _remember(self, key, decision, source):
+        with self._lock:
+            self.counts[source] += 1
+            count(f"relevance.{source}")
+            self._decisions[key] = decision
+            while len(self._decisions) > self.cache_size:
+                self._decisions.popitem(last=False)
+
+    def _decide(self, key, query_vector):
+        words = set(key.split())
+        if POULTRY_TERMS & words or len(SHARED_TERMS & words) >= MIN_SHARED_HITS:
+            return True, "keyword"
+
+        score = self.topic_score(query_vector)
+        if score is not None and score >= self.accept:
+            return True, "accepted"
+        if score is not None and score < self.reject:
+            return False, "rejected"
+        return None, None
+
+    def topic_score(self, query_vector):
+        """Highest cosine similarity to a corpus topic centroid, or None without centroids."""
+        if self.centroids is None or not len(self.centroids):
+            return None
+        vector = np.asarray(query_vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        if not norm:
+            return None
+        return float(np.max(self.centroids @ (vector / norm)))
@@ -0,0 +1,186 @@
+import hashlib
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from gemini import generate_text
+
+# ✅ Map-Reduce Settings
+CHUNK_CHARS = int(os.getenv("LAB_CHUNK_CHARS", "12000"))  # report text per map call
+MAX_PARALLEL = int(os.getenv("LAB_MAX_PARALLEL", "4"))  # concurrent Gemini calls per report
+CACHE_DIR = os.path.join(
+    os.getenv("POULTRY_RAG_CACHE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache"),
+    "lab_reports",
+)
+
+SPECIALIST = (
+    "You are an expert veterinary specialist with deep knowledge of poultry farming, especially layer birds."
+)
+
+FULL_PROMPT = (
+    f"{SPECIALIST} Analyze the following veterinary lab report of a layer bird and provide a comprehensive "
+    "assessment.Focus on identifying health issues, possible diseases, recommended treatment and medication, "
+    "nutritional deficiencies, and environmental stress factors:\n\n{text}"
+)
+
+MAP_PROMPT = (
+    f"{SPECIALIST} Below is one part ({{label}}) of a longer veterinary lab report of a layer bird. "
+    "List every abnormal or noteworthy result with its value and reference range, and what it may indicate "
+    "(health issues, possible diseases, nutritional deficiencies, environmental stress). Be concise; "
+    "other parts of the report are analyzed separately.\n\n{text}"
+)
+
+REDUCE_PROMPT = (
+    f"{SPECIALIST} The findings below were extracted from the parts of one veterinary lab report of a layer "
+    "bird. Merge them into a single comprehensive assessment without repeating yourself. Focus on identifying "
+    "health issues, possible diseases, recommended treatment and medication, nutritional deficiencies, and "
+    "environmental stress factors:\n\n{text}"
+)
+
+# A short line like "HAEMATOLOGY", "Serology:" or "Panel 3 - Biochemistry" starts a new test panel.
+# Only the "panel" keyword ignores case, and the other two forms allow no digits, so result
+# rows such as "Hb 12.5 g/dL" or "WBC 14 x10^3/uL" are never taken for headings.
+PANEL_HEADING = re.compile(
+    r"^\s*(?:[A-Z][A-Z &/()\-]{3,40}|[A-Za-z][A-Za-z ()/&\-]{2,40}:|(?i:panel)\b.{0,40})\s*$"
+)
+
+
+def _split_panels(text, limit):
+    """Split one oversized section at panel headings or line breaks into pieces of at most ``limit`` chars."""
+    pieces, current = [], []
+    for line in text.splitlines(keepends=True):
+        size = sum(map(len, current))
+        if current and (size + len(line) > limit or (PANEL_HEADING.match(line) and size > limit // 4)):
+            pieces.append("".join(current))
+            current = []
+        current.append(line)
+    if current:
+        pieces.append("".join(current))
+    return pieces
+
+
+def iter_chunks(sections, limit=CHUNK_CHARS):
+    """Group incoming ``(label, text)`` sections into ``(label, text)`` chunks of about ``limit`` chars.
+
+    Chunks are yielded as soon as they are full, so analysis can begin while
+    later pages are still being extracted.
+    """
+    labels, texts, size = [], [], 0
+    for label, text in sections:
+        if not text.strip():
+            continue
+        parts = _split_panels(text, limit) if len(text) > limit else [text]
+        for index, part in enumerate(parts):
+            part_label = label if len(parts) == 1 else f"{label} ({index + 1}/{len(parts)})"
+            if texts and size + len(part) > limit:
+                yield _join_label(labels), "\n".join(texts)
+                labels, texts, size = [], [], 0
+            labels.append(part_label)
+            texts.append(part)
+            size += len(part)
+    if texts:
+        yield _join_label(labels), "\n".join(texts)
+
+
+def _join_label(labels):
+    return labels[0] if len(labels) == 1 else f"{labels[0]} – {labels[-1]}"
+
+
+def _cache_path(key):
+    return os.path.join(CACHE_DIR, f"{key}.md")
+
+
+def _cache_get(key):
+    try:
+        with open(_cache_path(key), "r", encoding="utf-8") as file:
+            return file.read()
+    except FileNotFoundError:
+        return None
+
+
+def _cache_put(key, text):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = f"{_cache_path(key)}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        file.write(text)
+    os.replace(tmp_path, _cache_path(key))
+
+
+def _digest(*parts):
+    return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+
+
+def _cached_call(generate, prompt, key):
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached, True
+    result = generate(prompt)
+    _cache_put(key, result)
+    return result, False
+
+
+def analyze_report_stream(sections, generate, max_parallel=MAX_PARALLEL, chunk_chars=CHUNK_CHARS):
+    """Map-reduce analysis of a lab report; yields ``(kind, label, text, cached)`` events.
+
+    ``kind`` is "partial" for each analyzed chunk (in completion order) and
+    "final" once for the merged assessment. ``generate(prompt) -> str`` is the
+    LLM call. Chunk results and the final assessment are cached by content hash,
+    so re-uploading the same report makes no LLM calls.
+    """
+    chunks = []
+    results = {}  # chunk index -> findings
+    pending = {}  # future -> chunk index
+
+    with ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix="lab-map") as pool:
+        def submit(index):
+            label, text = chunks[index]
+            prompt = MAP_PROMPT.format(label=label, text=text)
+            pending[pool.submit(_cached_call, generate, prompt, _digest("map", text))] = index
+
+        def collect(futures):
+            for future in futures:
+                index = pending.pop(future)
+                results[index], cached = future.result()
+                yield "partial", chunks[index][0], results[index], cached
+
+        for label, text in iter_chunks(sections, chunk_chars):
+            chunks.append((label, text))
+            # The first chunk waits for a second one: a one-chunk report needs no map step
+            if len(chunks) == 2:
+                submit(0)
+            if len(chunks) >= 2:
+                submit(len(chunks) - 1)
+            yield from collect([future for future in list(pending) if future.done()])
+
+        yield from collect(as_completed(list(pending)))
+
+    if not chunks:
+        return
+
+    if len(chunks) == 1:
+        label, text = chunks[0]
+        final, cached = _cached_call(generate, FULL_PROMPT.format(text=text), _digest("full", text))
+        yield "final", label, final, cached
+        return
+
+    merged = "\n\n".join(f"### {chunks[i][0]}\n{results[i]}" for i in range(len(chunks)))
+    reduce_key = _digest("reduce", *(text for _, text in chunks))
+    final, cached = _cached_call(generate, REDUCE_PROMPT.format(text=merged), reduce_key)
+    yield "final", None, final, cached
+
+
+# lab Analysis
+def analyze_lab_report_stream(sections):
+    """Map-reduce analysis over ``(label, text)`` sections with Gemini; see analyze_report_stream."""
+    return analyze_report_stream(sections, generate_text)
+
+
+def analyze_lab_report(report_text):
+    try:
+        final = ""
+        for kind, _, text, _ in analyze_lab_report_stream([("Report", report_text)]):
+            if kind == "final":
+                final = text
+        return final
+    except Exception as e:
+        return f"Error analyzing lab report: {str(e)}"
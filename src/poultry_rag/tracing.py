@@ -0,0 +1,261 @@
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ✅ Tracing Settings
+# Finished spans are appended here as JSON lines; TRACE_FILE="" turns the export off
+TRACE_FILE = os.getenv("TRACE_FILE", os.path.join(
+    os.getenv("POULTRY_RAG_CACHE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache"),
+    "traces.jsonl",
+))
+TRACE_MAX_BYTES = int(os.getenv("TRACE_MAX_BYTES", str(50 * 1024 * 1024)))  # then rotated to traces.jsonl.1
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # 0 = no /metrics endpoint
+WINDOW = 1000  # recent durations kept per span name for p50/p95
+METRIC_PREFIX = "poultry_rag"
+
+_current = contextvars.ContextVar("poultry_rag_span", default=None)
+
+
+class Span:
+    """One timed stage of a trace; ``set`` attaches attributes such as sizes or token counts."""
+
+    def __init__(self, name, attrs=None, parent=None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.span_id = uuid.uuid4().hex[:16]
+        self.start = time.time()
+        self.duration_ms = None
+        self.attrs = dict(attrs or {})
+        self.error = None
+        self._started = time.perf_counter()
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def fail(self, error):
+        self.error = f"{type(error).__name__}: {error}"
+
+    def finish(self, duration_ms=None):
+        if duration_ms is None:
+            duration_ms = (time.perf_counter() - self._started) * 1000
+        self.duration_ms = round(duration_ms, 3)
+        recorder.record(self)
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": self.duration_ms,
+            "status": "error" if self.error else "ok",
+            "error": self.error,
+            "attrs": self.attrs,
+        }
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of ``values`` (0-100)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+
+class Recorder:
+    """Keeps recent span durations and counters in memory and appends finished spans to a JSONL file."""
+
+    def __init__(self, path=TRACE_FILE, window=WINDOW):
+        self.path = path
+        self.durations = defaultdict(lambda: deque(maxlen=window))
+        self.totals = defaultdict(lambda: [0, 0.0, 0])  # name -> [count, sum_ms, errors]
+        self.counters = defaultdict(float)
+        self.recent = deque(maxlen=500)
+        self._lock = threading.Lock()
+
+    def record(self, span):
+        entry = span.to_dict()
+        with self._lock:
+            self.durations[span.name].append(span.duration_ms)
+            totals = self.totals[span.name]
+            totals[0] += 1
+            totals[1] += span.duration_ms
+            totals[2] += bool(span.error)
+            self.recent.append(entry)
+            if self.path:
+                self._export(entry)
+
+    def _export(self, entry):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            if os.path.exists(self.path) and os.path.getsize(self.path) > TRACE_MAX_BYTES:
+                os.replace(self.path, f"{self.path}.1")
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.write(json.dumps(entry, default=str) + "\n")
+        except OSError as e:
+            print(f"⚠️ Could not write trace: {e}")
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+
+    def summary(self):
+        """``{span name: {"count", "errors", "p50_ms", "p95_ms"}}`` over the recent window."""
+        with self._lock:
+            return {
+                name: {
+                    "count": self.totals[name][0],
+                    "errors": self.totals[name][2],
+                    "p50_ms": percentile(list(durations), 50),
+                    "p95_ms": percentile(list(durations), 95),
+                }
+                for name, durations in sorted(self.durations.items())
+            }
+
+    def last_trace(self, root_name=None):
+        """Spans of the most recent trace (optionally the most recent one rooted at ``root_name``)."""
+        with self._lock:
+            spans = list(self.recent)
+        roots = [span for span in spans if span["parent_id"] is None and root_name in (None, span["name"])]
+        if not roots:
+            return []
+        trace_id = roots[-1]["trace_id"]
+        return sorted((span for span in spans if span["trace_id"] == trace_id), key=lambda span: span["start"])
+
+    def prometheus(self):
+        """Prometheus text exposition of span latency summaries and counters."""
+        lines = [f"# TYPE {METRIC_PREFIX}_span_duration_ms summary"]
+        with self._lock:
+            for name, durations in sorted(self.durations.items()):
+                count, total, _ = self.totals[name]
+                for q in (0.5, 0.95):
+                    lines.append(f'{METRIC_PREFIX}_span_duration_ms{{span="{name}",quantile="{q}"}} '
+                                 f"{percentile(list(durations), q * 100)}")
+                lines.append(f'{METRIC_PREFIX}_span_duration_ms_sum{{span="{name}"}} {total}')
+                lines.append(f'{METRIC_PREFIX}_span_duration_ms_count{{span="{name}"}} {count}')
+            lines.append(f"# TYPE {METRIC_PREFIX}_span_errors_total counter")
+            for name, (_, _, errors) in sorted(self.totals.items()):
+                lines.append(f'{METRIC_PREFIX}_span_errors_total{{span="{name}"}} {errors}')
+            lines.append(f"# TYPE {METRIC_PREFIX}_events_total counter")
+            for name, value in sorted(self.counters.items()):
+                lines.append(f'{METRIC_PREFIX}_events_total{{event="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+recorder = Recorder()
+
+
+@contextmanager
+def span(name, **attrs):
+    """Time the ``with`` block as a child of the current span.
+
+    Exceptions mark the span as failed and are re-raised. Streamlit's
+    st.stop()/rerun are BaseExceptions and do not count as errors.
+    """
+    current = Span(name, attrs, _current.get())
+    token = _current.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.fail(e)
+        raise
+    finally:
+        _current.reset(token)
+        current.finish()
+
+
+def record(name, duration_ms, error=None, **attrs):
+    """Record an already-timed stage (e.g. a streamed generation) under the current span."""
+    finished = Span(name, attrs, _current.get())
+    if error is not None:
+        finished.fail(error)
+    finished.finish(duration_ms)
+
+
+def traced(name):
+    """Decorator form of ``span``."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count(name, value=1):
+    recorder.count(name, value)
+
+
+def current_span():
+    return _current.get()
+
+
+# Local metrics endpoint: /metrics (Prometheus text) and /summary (JSON)
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith("/metrics"):
+            body, content_type = recorder.prometheus(), "text/plain; version=0.0.4"
+        elif self.path.startswith("/summary"):
+            body, content_type = json.dumps(recorder.summary()), "application/json"
+        else:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port=METRICS_PORT, host=METRICS_HOST):
+    """Serve /metrics on a daemon thread; safe to call on every Streamlit rerun."""
+    global _server
+    with _server_lock:
+        if _server is None and port:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+            print(f"📈 Metrics on http://{host}:{port}/metrics")
+    return _server
+
+
+def summarize_file(path=TRACE_FILE, since=None):
+    """Per-span count, errors, p50 and p95 from a JSONL trace file (spans started after ``since``)."""
+    durations, errors = defaultdict(list), defaultdict(int)
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if since and entry["start"] < since:
+                continue
+            durations[entry["name"]].append(entry["duration_ms"])
+            errors[entry["name"]] += entry["status"] == "error"
+    return {
+        name: {
+            "count": len(values),
+            "errors": errors[name],
+            "p50_ms": percentile(values, 50),
+            "p95_ms": percentile(values, 95),
+        }
+        for name, values in sorted(durations.items())
+    }
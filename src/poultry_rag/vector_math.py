@@ -0,0 +1,48 @@
+import numpy as np
+
+# Rows processed per matrix product, so assigning millions of vectors stays within memory
+ASSIGN_BATCH = 65536
+
+# k-means trains on at most this many vectors per centroid (the rest are only assigned)
+MAX_POINTS_PER_CENTROID = 256
+
+
+def normalize(vectors):
+    """Scale every row to unit length (zero rows are left as they are)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def assign(vectors, centroids, batch=ASSIGN_BATCH):
+    """Index of the most similar centroid for every row."""
+    assignment = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), batch):
+        block = np.asarray(vectors[start:start + batch], dtype=np.float32)
+        assignment[start:start + batch] = np.argmax(block @ centroids.T, axis=1)
+    return assignment
+
+
+def kmeans(vectors, k, iterations=20, seed=0):
+    """Spherical k-means over unit vectors; returns (unit centroids, assignment per row)."""
+    k = max(1, min(k, len(vectors)))
+    rng = np.random.default_rng(seed)
+
+    sample_size = min(len(vectors), k * MAX_POINTS_PER_CENTROID)
+    sample_rows = np.sort(rng.choice(len(vectors), sample_size, replace=False))
+    sample = np.asarray(vectors[sample_rows], dtype=np.float32)
+    centroids = sample[rng.choice(len(sample), k, replace=False)].copy()
+
+    for _ in range(iterations):
+        labels = assign(sample, centroids)
+        order = np.argsort(labels, kind="stable")
+        counts = np.bincount(labels, minlength=k)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+        sums = centroids.copy()  # an empty cluster keeps its previous centroid
+        filled = counts > 0
+        sums[filled] = np.add.reduceat(sample[order], starts[filled], axis=0)
+        centroids = normalize(sums)
+
+    return centroids, assign(vectors, centroids)
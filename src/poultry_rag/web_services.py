@@ -0,0 +1,119 @@
+import os
+
+import requests
+
+import http_client
+from config import get_secret
+from relevance import normalize_query
+from tracing import traced
+
+YOUTUBE_API_KEY = get_secret("YOUTUBE_API_KEY")
+WEATHER_API_KEY = get_secret("WEATHER_API_KEY")
+
+
+# Function to perform Google Search
+@traced("web_search")
+def web_search(query, num_results=5):
+    """Fetch top search results from Google Custom Search API.
+
+    A failed request raises ``requests.RequestException`` rather than returning
+    an empty list, so callers can tell an outage from a search with no results.
+    """
+    GOOGLE_SEARCH_API = os.getenv("GOOGLE_SEARCH_API")
+    GOOGLE_CSE_ID = os.getenv("GOOGLE_CSE_ID")
+
+    if not GOOGLE_SEARCH_API or not GOOGLE_CSE_ID:
+        print("⚠️ API Key or Search Engine ID is missing!")
+        return []
+
+    url = f"https://www.googleapis.com/customsearch/v1"
+    params = {
+        "q": query,
+        "key": GOOGLE_SEARCH_API,
+        "cx": GOOGLE_CSE_ID,
+        "num": num_results
+    }
+    response = http_client.get(
+        url, params=params, ttl=http_client.SEARCH_TTL,
+        cache_key=("web", normalize_query(query), num_results)
+    )
+
+    results = response.json().get("items", [])
+    search_results = []
+
+    for item in results:
+        search_results.append({
+            "title": item.get("title", "No Title"),
+            "url": item.get("link", "#"),
+            "snippet": item.get("snippet", "No description available.")
+        })
+
+    return search_results
+#youtube search results
+
+@traced("youtube")
+def get_youtube_videos(query):
+    """Top YouTube videos as Markdown; raises ``requests.RequestException`` on failure."""
+    url = "https://www.googleapis.com/youtube/v3/search"
+    params = {"part": "snippet", "q": query, "type": "video", "key": YOUTUBE_API_KEY, "maxResults": 3}
+    response = http_client.get(
+        url, params=params, ttl=http_client.SEARCH_TTL,
+        cache_key=("youtube", normalize_query(query), 3)
+    )
+
+    data = response.json()
+    items = data.get("items", [])
+
+    if not items:
+        return "⚠️ No relevant videos found."
+
+    videos = []
+    for item in items:
+        video_id = item["id"]["videoId"]
+        title = item["snippet"]["title"]
+        description = item["snippet"]["description"].split(".")[0]  # Extract first sentence
+        video_url = f"https://www.youtube.com/watch?v={video_id}"
+
+        videos.append(f"📹 **[{title}]({video_url})**\n📝 {description}...\n")
+
+    return "\n".join(videos)
+# Function to fetch weather data and give poultry recommendations
+@traced("weather")
+def get_weather(city="Karachi"):
+    try:
+        url = "https://api.openweathermap.org/data/2.5/weather"
+        params = {"q": city, "appid": WEATHER_API_KEY, "units": "metric"}
+        # Streamlit reruns the page on every interaction; weather only changes every few minutes
+        response = http_client.get(
+            url, params=params, ttl=http_client.WEATHER_TTL,
+            cache_key=("weather", city.strip().lower())
+        )
+        data = response.json()
+
+        temp = data["main"]["temp"]
+        humidity = data["main"]["humidity"]
+        wind_speed = data["wind"]["speed"]
+        weather_desc = data["weather"][0]["description"]
+
+        # Calculate "Real Feel" Temperature
+        heat_index = temp + (0.33 * humidity) - (0.7 * wind_speed) - 4
+
+        recommendations = []
+
+        if temp > 35:
+            recommendations.append("🔥 Extreme heat detected! Provide electrolytes & ensure shade for poultry.")
+        elif temp < 15:
+            recommendations.append("❄️ Cold alert! Use heaters & deep bedding to keep birds warm.")
+
+        if wind_speed > 20:
+            recommendations.append("💨 Strong winds detected! Secure poultry houses properly.")
+
+        if "rain" in weather_desc.lower():
+            recommendations.append("☔ Rain alert! Keep sheds dry and ensure proper drainage.")
+
+        recommendations.append(f"🌡️ Real Feel Temperature: {round(heat_index, 1)}°C")
+
+        return temp, humidity, wind_speed, weather_desc, recommendations
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching weather data: {e}")
+        return None, None, None, None, ["⚠️ Unable to fetch weather data."]